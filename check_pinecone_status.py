@@ -1,51 +1,91 @@
 #!/usr/bin/env python3
 """Quick check of Pinecone index status and vector counts"""
 
+import asyncio
+from functools import lru_cache
+
 from pinecone import Pinecone
 from config import settings
 
-# Initialize Pinecone
-pc = Pinecone(api_key=settings.pinecone_api_key)
-index = pc.Index(settings.pinecone_index_name)
-
-print("=" * 80)
-print("PINECONE INDEX STATUS CHECK")
-print("=" * 80)
-
-try:
-    # Get index stats
-    stats = index.describe_index_stats()
-    print(f"\n✓ Connected to index: {settings.pinecone_index_name}")
-    print(f"  Dimensions: {stats.get('dimension', 'N/A')}")
-    print(f"  Total vector count: {stats.get('total_vector_count', 'N/A')}")
-    
-    # Check namespaces
-    namespaces = stats.get('namespaces', {})
-    print(f"\n📊 Namespace Details:")
-    for ns_name, ns_stats in namespaces.items():
-        vector_count = ns_stats.get('vector_count', 0)
-        print(f"  • {ns_name}: {vector_count} vectors")
-    
-    # Verify key namespaces exist
-    print(f"\n🔍 Key Namespace Checks:")
-    if 'maass_wine_list' in namespaces:
-        print(f"  ✅ 'maass_wine_list': {namespaces['maass_wine_list']['vector_count']} vectors")
-    else:
-        print(f"  ❌ 'maass_wine_list': NOT FOUND")
-    
-    if 'producers' in namespaces:
-        print(f"  ✅ 'producers': {namespaces['producers']['vector_count']} vectors")
-    else:
-        print(f"  ❌ 'producers': NOT FOUND")
-    
-    if 'master' in namespaces:
-        print(f"  ⚠️  'master': STILL EXISTS ({namespaces['master']['vector_count']} vectors) - should be deleted")
-    else:
-        print(f"  ✅ 'master': DELETED (as expected)")
-    
-except Exception as e:
-    print(f"❌ Error checking Pinecone: {str(e)}")
-    import traceback
-    traceback.print_exc()
-
-print("\n" + "=" * 80)
+# Namespaces probed alongside the index stats call
+KEY_NAMESPACES = ("maass_wine_list", "producers", "master")
+
+
+@lru_cache(maxsize=4)
+def get_index(api_key: str, index_name: str):
+    """Reuse one Pinecone index handle (and its connection pool) per process."""
+    return Pinecone(api_key=api_key).Index(index_name, pool_threads=8)
+
+
+async def fetch_status(index):
+    """Fetch index stats and probe every key namespace concurrently."""
+    # Unit vector: cosine queries reject an all-zero vector
+    probe = [1.0] + [0.0] * (settings.embedding_dimensions - 1)
+    results = await asyncio.gather(
+        asyncio.to_thread(index.describe_index_stats),
+        *(
+            asyncio.to_thread(index.query, vector=probe, top_k=1, namespace=ns)
+            for ns in KEY_NAMESPACES
+        ),
+        return_exceptions=True
+    )
+    stats, probes = results[0], results[1:]
+    if isinstance(stats, Exception):
+        raise stats
+    return stats, dict(zip(KEY_NAMESPACES, probes))
+
+
+async def main():
+    # Initialize Pinecone
+    index = get_index(settings.pinecone_api_key, settings.pinecone_index_name)
+
+    print("=" * 80)
+    print("PINECONE INDEX STATUS CHECK")
+    print("=" * 80)
+
+    try:
+        # Get index stats
+        stats, probes = await fetch_status(index)
+        print(f"\n✓ Connected to index: {settings.pinecone_index_name}")
+        print(f"  Dimensions: {stats.get('dimension', 'N/A')}")
+        print(f"  Total vector count: {stats.get('total_vector_count', 'N/A')}")
+        
+        # Check namespaces
+        namespaces = stats.get('namespaces', {})
+        print(f"\n📊 Namespace Details:")
+        for ns_name, ns_stats in namespaces.items():
+            vector_count = ns_stats.get('vector_count', 0)
+            print(f"  • {ns_name}: {vector_count} vectors")
+        
+        # Verify key namespaces exist
+        print(f"\n🔍 Key Namespace Checks:")
+        if 'maass_wine_list' in namespaces:
+            print(f"  ✅ 'maass_wine_list': {namespaces['maass_wine_list']['vector_count']} vectors")
+        else:
+            print(f"  ❌ 'maass_wine_list': NOT FOUND")
+        
+        if 'producers' in namespaces:
+            print(f"  ✅ 'producers': {namespaces['producers']['vector_count']} vectors")
+        else:
+            print(f"  ❌ 'producers': NOT FOUND")
+        
+        if 'master' in namespaces:
+            print(f"  ⚠️  'master': STILL EXISTS ({namespaces['master']['vector_count']} vectors) - should be deleted")
+        else:
+            print(f"  ✅ 'master': DELETED (as expected)")
+
+        # Report namespaces that exist but cannot be queried
+        for ns_name, probe in probes.items():
+            if ns_name in namespaces and isinstance(probe, Exception):
+                print(f"  ❌ '{ns_name}': query failed ({probe})")
+        
+    except Exception as e:
+        print(f"❌ Error checking Pinecone: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,8 +4,18 @@ Loads settings from environment variables with encrypted API key support.
 """
 from pydantic_settings import BaseSettings
 from typing import Optional
+from functools import cached_property, lru_cache
 from crypto_utils import SecureKeyManager
 
+# Every Fernet token starts with this (version byte + timestamp prefix)
+FERNET_TOKEN_PREFIX = "gAAAAAB"
+
+
+@lru_cache(maxsize=4)
+def _get_key_manager(encryption_key: Optional[str]) -> SecureKeyManager:
+    """Build one SecureKeyManager (and Fernet cipher) per encryption key."""
+    return SecureKeyManager(encryption_key=encryption_key)
+
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
@@ -18,11 +28,15 @@ class Settings(BaseSettings):
     embedding_dimensions: int = 1024  # OpenAI text-embedding-3-small dimension
     master_list_id: str = "master"
     master_namespace: str = "master"
+    master_dual_write: bool = True  # Also write separate master-list vectors; filter on list_id (off: list_ids, or list_id for older vectors)
     
     # OpenAI API (alternative for embeddings)
     openai_api_key: Optional[str] = None
     openai_embedding_model: str = "text-embedding-3-small"
     use_openai_embeddings: bool = True
+    embed_concurrency: int = 4  # Embedding batches in flight during ingest
+    embed_max_retries: int = 3  # SDK retries with exponential backoff on 429/5xx/timeouts
+    embedding_cache_path: str = "data/cache/embeddings.sqlite"  # Re-ingest skips unchanged texts
     
     # Pinecone Configuration
     pinecone_api_key: str
@@ -36,6 +50,11 @@ class Settings(BaseSettings):
     redis_port: int = 6379
     redis_db: int = 0
     redis_password: Optional[str] = None
+    redis_wine_msgpack: bool = False  # Store wines as msgpack strings; hashes written earlier stay readable
+    
+    # Semantic query cache
+    semantic_cache_threshold: float = 0.93  # Minimum cosine similarity for a hit
+    semantic_cache_ttl: int = 3600  # Seconds
     
     # Application Settings
     environment: str = "development"
@@ -45,6 +64,17 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = False
     
+    @cached_property
+    def decrypted_xai_key(self) -> str:
+        """XAI API key, decrypted once and cached on the settings instance."""
+        if not self.xai_api_key.startswith(FERNET_TOKEN_PREFIX):
+            return self.xai_api_key
+        try:
+            return _get_key_manager(self.encryption_key).decrypt_key(self.xai_api_key)
+        except Exception:
+            # If decryption fails, assume key is not encrypted
+            return self.xai_api_key
+    
     def get_decrypted_xai_key(self) -> str:
         """
         Get decrypted XAI API key.
@@ -52,12 +82,7 @@ class Settings(BaseSettings):
         Returns:
             Decrypted XAI API key string
         """
-        try:
-            key_manager = SecureKeyManager(encryption_key=self.encryption_key)
-            return key_manager.decrypt_key(self.xai_api_key)
-        except Exception:
-            # If decryption fails, assume key is not encrypted
-            return self.xai_api_key
+        return self.decrypted_xai_key
 
 
 # Global settings instance
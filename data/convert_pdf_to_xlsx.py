@@ -4,50 +4,131 @@ Tries table extraction first; falls back to raw text if no tables found.
 """
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Callable, Iterable, List, Sequence, Tuple
+import itertools
 import logging
+import os
 
 import pandas as pd
 import pdfplumber
+import xlsxwriter
 
 logger = logging.getLogger(__name__)
 
+# Explicit extraction settings, resolved once instead of per page. The PDFs
+# are opened without laparams so pdfminer's layout analysis stays disabled.
+TEXT_SETTINGS = {"x_tolerance": 3, "y_tolerance": 3, "layout": False}
+TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "snap_tolerance": 3,
+}
+# Each worker handle caches parsed page objects until it is closed, so very
+# long documents are processed in bounded blocks to cap peak memory
+MAX_PAGES_PER_BLOCK = 500
+# Spawning a worker and reopening the PDF costs more than extracting a few
+# pages, so documents are only split across processes in blocks at least
+# this long; short menus run entirely in-process
+MIN_PAGES_PER_BLOCK = 20
 
-def extract_tables(pdf_path: Path) -> List[pd.DataFrame]:
-    tables: List[pd.DataFrame] = []
+
+def _page_ranges(pdf_path: Path) -> List[Tuple[Path, int, int]]:
+    """Split the PDF's pages into contiguous blocks, one per worker where possible."""
     with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+    workers = max(1, min(os.cpu_count() or 1, page_count // MIN_PAGES_PER_BLOCK))
+    step = -(-page_count // workers) if page_count else 1
+    step = min(step, MAX_PAGES_PER_BLOCK)
+    return [
+        (pdf_path, start, min(start + step, page_count))
+        for start in range(0, page_count, step)
+    ]
+
+
+def map_pdf_pages(worker: Callable, pdf_path: Path) -> list:
+    """Run a per-block worker across all pages, returning results in page order."""
+    ranges = _page_ranges(pdf_path)
+    if len(ranges) <= 1:
+        return [worker(args) for args in ranges]
+    workers = min(len(ranges), os.cpu_count() or 1)
+    if workers == 1:
+        return [worker(args) for args in ranges]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(worker, ranges))
+
+
+def _extract_tables_from_pages(args: Tuple[Path, int, int]) -> List[List[List[str]]]:
+    # pdfplumber objects are not picklable, so each worker opens its own handle
+    pdf_path, start, stop = args
+    tables: List[List[List[str]]] = []
+    with pdfplumber.open(pdf_path, pages=list(range(start + 1, stop + 1))) as pdf:
         for page in pdf.pages:
-            page_tables = page.extract_tables()
+            # The "lines" strategy can only find tables on pages with ruling edges
+            if not (page.lines or page.rects or page.curves):
+                continue
+            page_tables = page.extract_tables(TABLE_SETTINGS)
             for table in page_tables:
                 if not table or len(table) < 2:
                     continue
-                tables.append(pd.DataFrame(table))
+                tables.append(table)
+    return tables
+
+
+def _extract_text_from_pages(args: Tuple[Path, int, int]) -> Tuple[List[int], List[str]]:
+    pdf_path, start, stop = args
+    pages: List[int] = []
+    raws: List[str] = []
+    with pdfplumber.open(pdf_path, pages=list(range(start + 1, stop + 1))) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text(**TEXT_SETTINGS) or ""
+            cleaned_lines = [line for line in (s.strip() for s in text.splitlines()) if line]
+            raws.extend(cleaned_lines)
+            pages.extend([page.page_number] * len(cleaned_lines))
+    return pages, raws
+
+
+def extract_tables(pdf_path: Path) -> List[List[List[str]]]:
+    """Return each extracted table as raw rows (no per-table DataFrame)."""
+    tables: List[List[List[str]]] = []
+    for block_tables in map_pdf_pages(_extract_tables_from_pages, pdf_path):
+        tables.extend(block_tables)
     return tables
 
 
 def extract_text_lines(pdf_path: Path) -> pd.DataFrame:
-    lines = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_number, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ""
-            for line in text.splitlines():
-                cleaned = line.strip()
-                if cleaned:
-                    lines.append({"page": page_number, "raw_text": cleaned})
-    return pd.DataFrame(lines)
+    pages: List[int] = []
+    raws: List[str] = []
+    for block_pages, block_raws in map_pdf_pages(_extract_text_from_pages, pdf_path):
+        pages.extend(block_pages)
+        raws.extend(block_raws)
+    return pd.DataFrame({"page": pages, "raw_text": raws})
+
+
+def write_rows_to_xlsx(xlsx_path: Path, rows: Iterable[Sequence]) -> None:
+    """Stream rows to a single-sheet workbook, flushing each row as it is written."""
+    # constant_memory only keeps the current row in memory, so rows must be
+    # written strictly in order (DataFrame.to_excel writes column by column)
+    workbook = xlsxwriter.Workbook(str(xlsx_path), {"constant_memory": True})
+    worksheet = workbook.add_worksheet()
+    for row_number, row in enumerate(rows):
+        worksheet.write_row(row_number, 0, row)
+    workbook.close()
 
 
 def convert_pdf_to_xlsx(pdf_path: Path, xlsx_path: Path) -> Path:
     tables = extract_tables(pdf_path)
     if tables:
-        combined = pd.concat(tables, ignore_index=True)
-        combined.to_excel(xlsx_path, index=False, header=False)
+        write_rows_to_xlsx(xlsx_path, itertools.chain.from_iterable(tables))
         logger.info("Extracted %s tables to %s", len(tables), xlsx_path)
         return xlsx_path
 
     text_df = extract_text_lines(pdf_path)
-    text_df.to_excel(xlsx_path, index=False)
+    write_rows_to_xlsx(
+        xlsx_path,
+        itertools.chain([list(text_df.columns)], text_df.itertuples(index=False, name=None))
+    )
     logger.warning("No tables found; saved raw text to %s", xlsx_path)
     return xlsx_path
 
@@ -0,0 +1,92 @@
+"""
+Persistent embedding cache for ingestion.
+Maps a content hash of (model, text) to its embedding so re-ingests only
+pay for rows whose text actually changed.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import hashlib
+import logging
+import sqlite3
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Stay under SQLite's default bound-parameter limit
+_LOOKUP_CHUNK = 500
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed store of embeddings keyed by content hash.
+
+    Vectors are stored as float16 (half the bytes of float32). For the
+    normalized 1024-d embeddings this perturbs cosine distance by less
+    than 1e-3, which does not change retrieval in practice.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize EmbeddingCache.
+
+        Args:
+            path: SQLite database file (created if missing)
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb("
+            "hash TEXT PRIMARY KEY, model TEXT, dim INT, vec BLOB)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def content_hash(model: str, text: str) -> str:
+        """Cache key; includes the model so switching models invalidates cleanly."""
+        return hashlib.sha256(f"{model}|{text}".encode()).hexdigest()
+
+    def get(self, key: str, dim: Optional[int] = None) -> Optional[List[float]]:
+        """Return the cached embedding for key, or None on miss."""
+        return self.get_many([key], dim).get(key)
+
+    def get_many(self, keys: Iterable[str], dim: Optional[int] = None) -> Dict[str, List[float]]:
+        """
+        Look up several keys at once.
+
+        Args:
+            keys: Content hashes
+            dim: If given, entries stored with a different dimension are ignored
+
+        Returns:
+            Dict of hash -> embedding for the keys that were found
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        for i in range(0, len(unique_keys), _LOOKUP_CHUNK):
+            chunk = unique_keys[i:i + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT hash, dim, vec FROM emb WHERE hash IN ({placeholders})", chunk
+            )
+            for key, stored_dim, blob in rows:
+                if dim is not None and stored_dim != dim:
+                    continue
+                # Entries written before float16 storage are float32
+                dtype = np.float16 if len(blob) == 2 * stored_dim else np.float32
+                found[key] = np.frombuffer(blob, dtype=dtype).astype(np.float32).tolist()
+        return found
+
+    def put_many(self, embeddings: Dict[str, List[float]], model: str) -> None:
+        """Store embeddings keyed by content hash."""
+        if not embeddings:
+            return
+        rows = []
+        for key, vec in embeddings.items():
+            array = np.asarray(vec, dtype=np.float16)
+            rows.append((key, model, int(array.shape[0]), array.tobytes()))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO emb(hash, model, dim, vec) VALUES (?, ?, ?, ?)", rows
+            )
+        logger.debug(f"Cached {len(rows)} embeddings")
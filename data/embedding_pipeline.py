@@ -3,21 +3,82 @@ Embedding pipeline for Wine Sommelier Agent.
 Generates embeddings for wine data and stores in Pinecone for semantic search.
 Uses Grok LLM from XAI for semantic processing.
 """
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from pinecone import Pinecone, ServerlessSpec
+from pinecone.exceptions import NotFoundException
+import asyncio
+import bisect
+import itertools
+import json
 import logging
-from typing import List, Dict, Tuple, Optional
+from typing import Any, Callable, Iterable, List, Dict, Tuple, Optional
 import hashlib
 import time
 import re
+import threading
+from functools import cached_property, lru_cache
 
-from data.schema_definitions import Wine, WineEmbedding, PriceRange
+import numpy as np
+import pandas as pd
+
+from data.schema_definitions import Wine, PriceRange
+from data.embedding_cache import EmbeddingCache
 from data.wine_data_loader import WineDataLoader
 from config import settings
 
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for each in-flight Pinecone upsert
+_UPSERT_TIMEOUT = 30
+
+# Upper bounds (exclusive) of each price bucket, in order
+_PRICE_THRESHOLDS = (50, 100, 200)
+_PRICE_BUCKETS = (
+    PriceRange.BUDGET.value,
+    PriceRange.MID.value,
+    PriceRange.PREMIUM.value,
+    PriceRange.LUXURY.value,
+)
+
+
+def _make_wine_metadata(
+    wine: Wine,
+    text: str,
+    grapes: str,
+    keywords: str,
+    price_range: str,
+    list_id: str,
+    list_ids: List[str],
+    content_hash: str
+) -> Dict:
+    """
+    Build restaurant-namespace metadata for a wine directly.
+
+    Mirrors RestaurantWineEmbedding.to_pinecone_metadata() field for field
+    without per-wine model validation; keep the two in sync.
+    """
+    return {
+        # Core
+        "producer": wine.producer,
+        "label": wine.wine_name or "",
+        "grapes": grapes,
+        "region": wine.region,
+        "major_region": wine.region,
+        "country": wine.country,
+        "text": text,
+        "sync_version": 1,
+        # Restaurant
+        "price_range": price_range,
+        "price": wine.price,
+        "tasting_keywords": keywords,
+        "list_id": list_id,
+        "list_ids": list_ids or [list_id],
+        "qr_id": wine.qr_id,
+        "restaurant": wine.qr_id.removeprefix("qr_"),
+        "content_hash": content_hash,
+    }
+
 
 class EmbeddingError(Exception):
     """Raised when embedding generation fails (e.g. OpenAI outage)."""
@@ -26,6 +87,9 @@ class EmbeddingError(Exception):
 
 class EmbeddingPipeline:
     """Generates and manages wine embeddings in Pinecone using Grok LLM."""
+
+    # Index handles shared by every pipeline in the process, by index name
+    _index_cache: Dict[str, Any] = {}
     
     def __init__(self):
         """Initialize Grok/XAI and Pinecone clients."""
@@ -39,7 +103,10 @@ class EmbeddingPipeline:
         # Initialize OpenAI client if available
         self.openai_client = None
         if settings.openai_api_key:
-            self.openai_client = OpenAI(api_key=settings.openai_api_key)
+            self.openai_client = OpenAI(
+                api_key=settings.openai_api_key,
+                max_retries=settings.embed_max_retries
+            )
         
         # Initialize Pinecone
         self.pc = Pinecone(api_key=settings.pinecone_api_key)
@@ -55,16 +122,22 @@ class EmbeddingPipeline:
         
         logger.info("Embedding pipeline initialized with Grok LLM and Pinecone")
     
+    @cached_property
+    def embedding_cache(self) -> EmbeddingCache:
+        """On-disk embedding cache, opened on first use (only ingest needs it)."""
+        return EmbeddingCache(settings.embedding_cache_path)
+
     def _setup_index(self):
         """Create or connect to Pinecone index."""
-        # Check if index exists
-        existing_indexes = self.pc.list_indexes()
-        existing_names = {
-            idx["name"] if isinstance(idx, dict) else idx.name
-            for idx in existing_indexes
-        }
-        
-        if self.index_name not in existing_names:
+        cached = EmbeddingPipeline._index_cache.get(self.index_name)
+        if cached is not None:
+            self.index = cached
+            return
+
+        try:
+            # Extra pool threads let async_req upserts run in parallel
+            self.index = self._connect_index()
+        except NotFoundException:
             logger.info(f"Creating new Pinecone index: {self.index_name}")
             self.pc.create_index(
                 name=self.index_name,
@@ -77,9 +150,73 @@ class EmbeddingPipeline:
             )
             # Wait for index to be ready
             time.sleep(1)
-        
-        self.index = self.pc.Index(self.index_name)
+            self.index = self._connect_index()
+
+        EmbeddingPipeline._index_cache[self.index_name] = self.index
         logger.info(f"Connected to Pinecone index: {self.index_name}")
+
+    def _connect_index(self):
+        # A configured host skips the describe_index lookup entirely
+        if settings.pinecone_host:
+            return self.pc.Index(host=settings.pinecone_host, pool_threads=30)
+        return self.pc.Index(self.index_name, pool_threads=30)
+
+    def _submit_upsert(self, chunk: List[Dict], namespace: Optional[str]):
+        """Send one upsert request; returns its async result, or None if it already completed."""
+        try:
+            return self.index.upsert(vectors=chunk, namespace=namespace, async_req=True)
+        except TypeError:
+            # Client without async_req support (e.g. gRPC index)
+            self.index.upsert(vectors=chunk, namespace=namespace)
+            return None
+
+    def start_upsert(
+        self,
+        vectors: List[Dict],
+        namespace: Optional[str],
+        batch_size: int = 100
+    ) -> Callable[[], int]:
+        """
+        Submit vectors in batch_size chunks without waiting for them.
+
+        Every chunk is sent with async_req=True on the index's connection
+        pool, so the requests overlap each other and whatever the caller
+        does next. Returns a function that waits for all chunks and returns
+        how many vectors were upserted; failed chunks are logged and skipped.
+        """
+        pending = []
+        for i in range(0, len(vectors), batch_size):
+            chunk = vectors[i:i + batch_size]
+            try:
+                pending.append((len(chunk), self._submit_upsert(chunk, namespace)))
+            except Exception as e:
+                logger.error(f"Error upserting {len(chunk)} vectors to {namespace}: {e}")
+
+        def wait() -> int:
+            upserted = 0
+            for count, result in pending:
+                try:
+                    if result is not None:
+                        result.get(timeout=_UPSERT_TIMEOUT)
+                    upserted += count
+                except Exception as e:
+                    logger.error(f"Error upserting {count} vectors to {namespace}: {e}")
+            return upserted
+
+        return wait
+
+    def upsert_parallel(
+        self,
+        vectors: List[Dict],
+        namespace: Optional[str],
+        batch_size: int = 100
+    ) -> int:
+        """
+        Upsert vectors in concurrent batch_size chunks and wait for them.
+
+        Returns how many vectors were upserted (see start_upsert).
+        """
+        return self.start_upsert(vectors, namespace, batch_size)()
     
     def generate_wine_text(self, wine: Wine) -> str:
         """
@@ -102,6 +239,44 @@ class EmbeddingPipeline:
         
         return text
     
+    def generate_wine_texts(self, wines: List[Wine]) -> List[str]:
+        """
+        Vectorized generate_wine_text for a whole batch.
+
+        Builds every text with column-wise string concatenation; the output
+        is identical to calling generate_wine_text per wine, so cached
+        embeddings stay valid.
+        """
+        if not wines:
+            return []
+
+        df = pd.DataFrame({
+            "producer": [wine.producer for wine in wines],
+            "wine_name": [wine.wine_name for wine in wines],
+            "vintage": pd.array([wine.vintage or None for wine in wines], dtype="Int64"),
+            "region": [wine.region for wine in wines],
+            "country": [wine.country for wine in wines],
+            "grapes": [", ".join(wine.grapes) for wine in wines],
+            "wine_type": [wine.wine_type.value for wine in wines],
+            "tasting_note": [wine.tasting_note for wine in wines],
+            "price": [wine.price for wine in wines],
+        })
+        vintage_text = pd.Series(
+            np.where(df.vintage.notna(), df.vintage.astype(str) + " vintage", "non-vintage"),
+            index=df.index
+        )
+        # Continuation lines keep the indentation of generate_wine_text's template
+        newline = "\n        "
+        text = (
+            df.producer + " " + df.wine_name.fillna("") + " - " + vintage_text
+            + newline + "Region: " + df.region + ", " + df.country
+            + newline + "Grape varietals: " + df.grapes
+            + newline + "Wine type: " + df.wine_type
+            + newline + "Tasting profile: " + df.tasting_note
+            + newline + "Price: $" + df.price.astype(str)
+        )
+        return text.str.strip().tolist()
+
     def get_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings using OpenAI text-embedding-3-small (1024 dims).
@@ -124,6 +299,107 @@ class EmbeddingPipeline:
         except Exception as e:
             logger.error(f"OpenAI embedding error: {e}")
             raise EmbeddingError(f"Embedding service temporarily unavailable. Please try again in a moment.")
+
+    def get_embeddings_batched(self, text_batches: List[List[str]]) -> List[List[List[float]]]:
+        """
+        Embed several batches of texts concurrently.
+
+        Up to settings.embed_concurrency requests are in flight at once.
+        Results are returned in the same order as text_batches.
+        """
+        if not (settings.use_openai_embeddings and self.openai_client):
+            raise EmbeddingError("No embedding provider configured. Set USE_OPENAI_EMBEDDINGS=true.")
+
+        return asyncio.run(self._aget_embeddings_batched(text_batches))
+
+    def get_embeddings_cached(self, text_batches: List[List[str]]) -> List[Optional[List[List[float]]]]:
+        """
+        Embed several batches of texts, reusing cached embeddings.
+
+        Only distinct texts missing from the on-disk cache are sent to
+        OpenAI; new results are written back before returning. A batch
+        whose texts could not all be embedded comes back as None so one
+        failed request does not abort the whole ingest.
+        """
+        model = settings.openai_embedding_model
+        batch_hashes = [
+            [EmbeddingCache.content_hash(model, text) for text in texts]
+            for texts in text_batches
+        ]
+        embeddings = self.embedding_cache.get_many(
+            (h for hashes in batch_hashes for h in hashes),
+            dim=self.embedding_dimensions
+        )
+
+        # Each distinct uncached text is sent once; duplicates share its embedding
+        misses = []
+        pending = set()
+        for hashes, texts in zip(batch_hashes, text_batches):
+            batch = []
+            for h, text in zip(hashes, texts):
+                if h not in embeddings and h not in pending:
+                    pending.add(h)
+                    batch.append((h, text))
+            if batch:
+                misses.append(batch)
+        if misses:
+            if not (settings.use_openai_embeddings and self.openai_client):
+                raise EmbeddingError("No embedding provider configured. Set USE_OPENAI_EMBEDDINGS=true.")
+            fresh = asyncio.run(self._aget_embeddings_batched(
+                [[text for _, text in batch] for batch in misses],
+                return_exceptions=True
+            ))
+            new_embeddings = {}
+            for batch, vectors in zip(misses, fresh):
+                if isinstance(vectors, Exception):
+                    logger.error(f"Skipping {len(batch)} texts after embedding failure: {vectors}")
+                    continue
+                new_embeddings.update((h, vector) for (h, _), vector in zip(batch, vectors))
+            self.embedding_cache.put_many(new_embeddings, model)
+            embeddings.update(new_embeddings)
+
+        total = sum(len(hashes) for hashes in batch_hashes)
+        missed = sum(len(batch) for batch in misses)
+        logger.info(f"Embedding cache: {total - missed}/{total} hits")
+        return [
+            [embeddings[h] for h in hashes] if all(h in embeddings for h in hashes) else None
+            for hashes in batch_hashes
+        ]
+
+    async def _aget_embeddings_batched(
+        self,
+        text_batches: List[List[str]],
+        return_exceptions: bool = False
+    ) -> List[List[List[float]]]:
+        semaphore = asyncio.Semaphore(settings.embed_concurrency)
+        # The async client's connection pool is bound to this event loop
+        async with AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            max_retries=settings.embed_max_retries
+        ) as client:
+            return await asyncio.gather(
+                *(self._aget_embeddings(client, texts, semaphore) for texts in text_batches),
+                return_exceptions=return_exceptions
+            )
+
+    async def _aget_embeddings(
+        self,
+        client: AsyncOpenAI,
+        texts: List[str],
+        semaphore: asyncio.Semaphore
+    ) -> List[List[float]]:
+        async with semaphore:
+            try:
+                response = await client.embeddings.create(
+                    model=settings.openai_embedding_model,
+                    input=texts,
+                    dimensions=self.embedding_dimensions,
+                    timeout=10
+                )
+            except Exception as e:
+                logger.error(f"OpenAI embedding error: {e}")
+                raise EmbeddingError(f"Embedding service temporarily unavailable. Please try again in a moment.")
+        return [item.embedding for item in response.data]
     
     def extract_tasting_keywords(self, tasting_note: str) -> str:
         """
@@ -157,16 +433,63 @@ class EmbeddingPipeline:
             logger.error(f"Error extracting keywords with Grok: {e}")
             return tasting_note[:100]  # Fallback to truncated note
     
+    def extract_tasting_keywords_batch(self, tasting_notes: List[str]) -> List[str]:
+        """
+        Extract keywords for many tasting notes with a single Grok call.
+
+        Falls back to concurrent per-note calls if the response is not a
+        JSON array with one entry per note.
+
+        Args:
+            tasting_notes: Raw tasting note texts
+
+        Returns:
+            Comma-separated keywords, one string per note
+        """
+        if not tasting_notes:
+            return []
+
+        numbered = "\n".join(f"{i}) {note}" for i, note in enumerate(tasting_notes, start=1))
+        prompt = f"""For each numbered wine tasting note, extract 5-7 key flavor and aroma descriptors.
+        Return only a JSON array with one array of keyword strings per note, in order, no explanation.
+        
+        Tasting notes:
+        {numbered}
+        
+        JSON:"""
+
+        try:
+            response = self.grok_client.chat.completions.create(
+                model=self.chat_model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3,
+                max_tokens=100 * len(tasting_notes)
+            )
+            content = response.choices[0].message.content.strip()
+            parsed = json.loads(content[content.find("["):content.rfind("]") + 1])
+            if not isinstance(parsed, list) or len(parsed) != len(tasting_notes):
+                raise ValueError(f"expected {len(tasting_notes)} keyword lists, got {len(parsed)}")
+            return [
+                ", ".join(map(str, keywords)) if isinstance(keywords, list) else str(keywords)
+                for keywords in parsed
+            ]
+        except Exception as e:
+            logger.warning(f"Batch keyword extraction failed ({e}); falling back to per-note calls")
+            return asyncio.run(self._aextract_tasting_keywords(tasting_notes))
+
+    async def _aextract_tasting_keywords(self, tasting_notes: List[str]) -> List[str]:
+        semaphore = asyncio.Semaphore(5)
+
+        async def extract(note: str) -> str:
+            async with semaphore:
+                # extract_tasting_keywords already falls back to the truncated note
+                return await asyncio.to_thread(self.extract_tasting_keywords, note)
+
+        return await asyncio.gather(*(extract(note) for note in tasting_notes))
+
     def get_price_range(self, price: float) -> str:
         """Categorize price into range bucket."""
-        if price < 50:
-            return PriceRange.BUDGET.value
-        elif price < 100:
-            return PriceRange.MID.value
-        elif price < 200:
-            return PriceRange.PREMIUM.value
-        else:
-            return PriceRange.LUXURY.value
+        return _PRICE_BUCKETS[bisect.bisect_right(_PRICE_THRESHOLDS, price)]
     
     def embed_business_wines(
         self,
@@ -190,8 +513,8 @@ class EmbeddingPipeline:
         """
         logger.info(f"Embedding wines for business: {qr_id}")
         
-        # Get all wines for this business
-        wines = self.wine_loader.get_business_wines(qr_id)
+        # Stream wines from Redis instead of loading the whole list first
+        wines = self.wine_loader.stream_business_wines(qr_id)
 
         return self.embed_wines(
             wines=wines,
@@ -206,39 +529,110 @@ class EmbeddingPipeline:
 
     def embed_wines(
         self,
-        wines: List[Wine],
+        wines: Iterable[Wine],
         qr_id: str,
         batch_size: int = 100,
         list_id: Optional[str] = None,
         also_add_to_master: bool = False,
         namespace: Optional[str] = None,
         also_add_to_producers: bool = False,
-        producers_namespace: str = "producers"
+        producers_namespace: str = "producers",
+        upsert_batch_size: int = 100,
+        skip_unchanged: bool = True
     ) -> int:
-        """Embed a list of Wine objects without relying on Redis."""
-        
-        if not wines:
+        """
+        Embed Wine objects without relying on Redis.
+
+        wines may be any iterable (e.g. a Redis stream); it is consumed in
+        windows of batch_size * settings.embed_concurrency wines, so memory
+        stays bounded while each window's batches embed concurrently.
+        """
+        wines_iter = iter(wines)
+        window_size = batch_size * max(1, settings.embed_concurrency)
+        options = dict(
+            batch_size=batch_size,
+            list_id=list_id,
+            also_add_to_master=also_add_to_master,
+            namespace=namespace,
+            also_add_to_producers=also_add_to_producers,
+            producers_namespace=producers_namespace,
+            upsert_batch_size=upsert_batch_size,
+            skip_unchanged=skip_unchanged
+        )
+
+        total_seen = 0
+        total_embedded = 0
+        while window := list(itertools.islice(wines_iter, window_size)):
+            logger.info(f"Processing {len(window)} wines")
+            first_batch_number = total_seen // batch_size + 1
+            total_seen += len(window)
+            total_embedded += self._embed_window(window, first_batch_number, **options)
+
+        if not total_seen:
             logger.warning(f"No wines found for {qr_id}")
             return 0
+
+        logger.info(f"Successfully embedded {total_embedded} wines for {qr_id}")
+        return total_embedded
+
+    def _embed_window(
+        self,
+        wines: List[Wine],
+        first_batch_number: int,
+        batch_size: int,
+        list_id: Optional[str],
+        also_add_to_master: bool,
+        namespace: Optional[str],
+        also_add_to_producers: bool,
+        producers_namespace: str,
+        upsert_batch_size: int,
+        skip_unchanged: bool
+    ) -> int:
+        texts = self.generate_wine_texts(wines)
+        if skip_unchanged:
+            wines, texts = self._drop_unchanged(
+                wines,
+                texts,
+                list_id=list_id,
+                namespace=namespace,
+                also_add_to_master=also_add_to_master,
+                also_add_to_producers=also_add_to_producers,
+                producers_namespace=producers_namespace
+            )
+            if not wines:
+                logger.info("All wines in this window are already up to date")
+                return 0
         
-        logger.info(f"Processing {len(wines)} wines")
+        # Split into batches up front so every batch can be embedded concurrently
+        batches = [wines[i:i + batch_size] for i in range(0, len(wines), batch_size)]
+        batch_texts = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        batch_embeddings = self.get_embeddings_cached(batch_texts)
         
-        # Process in batches
         total_embedded = 0
-        for i in range(0, len(wines), batch_size):
-            batch = wines[i:i + batch_size]
-            
-            # Generate text representations
-            wine_texts = [self.generate_wine_text(wine) for wine in batch]
-            
-            # Generate embeddings (replace with actual embedding service)
-            embeddings = self.get_embeddings(wine_texts)
-            
+        batch_items = zip(batches, batch_texts, batch_embeddings)
+        for batch_number, (batch, texts, embeddings) in enumerate(batch_items, start=first_batch_number):
+            if embeddings is None:
+                logger.error(f"Skipping batch {batch_number}: embeddings unavailable")
+                continue
+
+            # Skip slow keyword extraction when using OpenAI embeddings
+            if settings.use_openai_embeddings and self.openai_client:
+                batch_keywords = [wine.tasting_note[:100] for wine in batch]  # Use truncated tasting note
+            else:
+                batch_keywords = self.extract_tasting_keywords_batch([wine.tasting_note for wine in batch])
+
+            # Derived per-wine fields shared by the list and producer vectors
+            batch_grapes = [",".join(wine.grapes) for wine in batch]
+
             vectors = self._build_vectors(
                 wines=batch,
                 embeddings=embeddings,
+                texts=texts,
+                batch_grapes=batch_grapes,
+                batch_keywords=batch_keywords,
                 list_id=list_id,
-                also_add_to_master=also_add_to_master
+                also_add_to_master=also_add_to_master,
+                producers_namespace=producers_namespace if also_add_to_producers else None
             )
 
             producer_vectors = []
@@ -246,49 +640,139 @@ class EmbeddingPipeline:
                 producer_vectors = self._build_producer_vectors(
                     wines=batch,
                     embeddings=embeddings,
+                    texts=texts,
+                    batch_grapes=batch_grapes,
                     list_id=list_id
                 )
             
-            # Upload to Pinecone
-            try:
-                self.index.upsert(vectors=vectors, namespace=namespace)
-                total_embedded += len(vectors)
-                if producer_vectors:
-                    self.index.upsert(vectors=producer_vectors, namespace=producers_namespace)
-                logger.info(f"Embedded batch {i//batch_size + 1}: {len(vectors)} wines")
-            except Exception as e:
-                logger.error(f"Error upserting batch: {e}")
+            # Upload to Pinecone (list and producers namespaces overlap)
+            wait_list = self.start_upsert(vectors, namespace, upsert_batch_size)
+            wait_producers = self.start_upsert(producer_vectors, producers_namespace, upsert_batch_size)
+            upserted = wait_list()
+            wait_producers()
+            total_embedded += upserted
+            logger.info(f"Embedded batch {batch_number}: {upserted} wines")
         
-        logger.info(f"Successfully embedded {total_embedded} wines for {qr_id}")
         return total_embedded
 
+    def _list_ids(self, effective_list_id: str, also_add_to_master: bool) -> List[str]:
+        # One vector serves every list via list_ids; master copies only while dual-writing
+        if also_add_to_master:
+            return [effective_list_id, self.master_list_id]
+        return [effective_list_id]
+
+    @staticmethod
+    def _content_hash(
+        text: str,
+        list_ids: List[str],
+        write_master_copy: bool,
+        producers_namespace: Optional[str]
+    ) -> str:
+        """
+        Fingerprint of everything one wine's ingest writes.
+
+        Covers the embedding text and the write targets (list_ids, the
+        master dual-write copy, the producers namespace), so changing any
+        of them makes the stored hash stale and the wine is re-embedded.
+        """
+        targets = f"{','.join(list_ids)}|{int(write_master_copy)}|{producers_namespace or ''}"
+        return hashlib.blake2b(f"{text}\n{targets}".encode("utf-8"), digest_size=12).hexdigest()
+
+    def _fetch_metadata(self, vector_ids: List[str], namespace: Optional[str]) -> Dict[str, Dict]:
+        """Metadata of the vectors that exist among vector_ids."""
+        found: Dict[str, Dict] = {}
+        # fetch accepts at most 1000 IDs per call
+        for i in range(0, len(vector_ids), 1000):
+            response = self.index.fetch(ids=vector_ids[i:i + 1000], namespace=namespace)
+            for vector_id, vector in response.vectors.items():
+                found[vector_id] = vector.metadata or {}
+        return found
+
+    def _drop_unchanged(
+        self,
+        wines: List[Wine],
+        texts: List[str],
+        list_id: Optional[str],
+        namespace: Optional[str],
+        also_add_to_master: bool,
+        also_add_to_producers: bool,
+        producers_namespace: str
+    ) -> Tuple[List[Wine], List[str]]:
+        """
+        Drop wines that are already fully written with the same content hash.
+
+        A wine is skipped only if its list vector carries a matching hash
+        and every other vector the ingest would write for it (the master
+        dual-write copy, the producer vector) still exists.
+        """
+        effective_list_id = list_id or wines[0].qr_id
+        write_master_copy = also_add_to_master and settings.master_dual_write
+        list_ids = self._list_ids(effective_list_id, also_add_to_master)
+        target_producers = producers_namespace if also_add_to_producers else None
+        vector_ids = [f"{effective_list_id}_{wine.qr_id}_{wine.wine_id}" for wine in wines]
+
+        try:
+            stored = self._fetch_metadata(vector_ids, namespace)
+            unchanged = [
+                vector_id in stored
+                and stored[vector_id].get("content_hash")
+                == self._content_hash(text, list_ids, write_master_copy, target_producers)
+                for text, vector_id in zip(texts, vector_ids)
+            ]
+            if write_master_copy:
+                master_ids = [
+                    f"{self.master_list_id}_{wine.qr_id}_{wine.wine_id}" if keep else None
+                    for wine, keep in zip(wines, unchanged)
+                ]
+                existing = self._fetch_metadata([i for i in master_ids if i], namespace)
+                unchanged = [keep and master_id in existing for keep, master_id in zip(unchanged, master_ids)]
+            if target_producers:
+                list_id_bytes = effective_list_id.encode("utf-8")
+                producer_ids = [
+                    self._producer_vector_id(wine, list_id_bytes) if keep else None
+                    for wine, keep in zip(wines, unchanged)
+                ]
+                existing = self._fetch_metadata([i for i in producer_ids if i], target_producers)
+                unchanged = [keep and producer_id in existing for keep, producer_id in zip(unchanged, producer_ids)]
+        except Exception as e:
+            logger.warning(f"Could not fetch existing vectors; re-embedding all: {e}")
+            return wines, texts
+
+        kept = [(wine, text) for wine, text, keep in zip(wines, texts, unchanged) if not keep]
+        skipped = len(wines) - len(kept)
+        if skipped:
+            logger.info(f"Skipping {skipped} unchanged wines")
+        return [wine for wine, _ in kept], [text for _, text in kept]
+
     def _build_vectors(
         self,
         wines: List[Wine],
         embeddings: List[List[float]],
+        texts: List[str],
+        batch_grapes: List[str],
+        batch_keywords: List[str],
         list_id: Optional[str],
-        also_add_to_master: bool
+        also_add_to_master: bool,
+        producers_namespace: Optional[str] = None
     ) -> List[Dict]:
         vectors = []
         effective_list_id = list_id or (wines[0].qr_id if wines else "")
-        for wine, embedding in zip(wines, embeddings):
-            # Skip slow keyword extraction when using OpenAI embeddings
-            if settings.use_openai_embeddings and self.openai_client:
-                keywords = wine.tasting_note[:100]  # Use truncated tasting note
-            else:
-                keywords = self.extract_tasting_keywords(wine.tasting_note)
+        list_ids = self._list_ids(effective_list_id, also_add_to_master)
+        write_master_copy = also_add_to_master and settings.master_dual_write
 
-            metadata = WineEmbedding(
-                wine_id=wine.wine_id,
-                qr_id=wine.qr_id,
-                list_id=effective_list_id,
-                producer=wine.producer,
-                region=wine.region,
-                grapes=",".join(wine.grapes),
-                wine_type=wine.wine_type.value,
+        for wine, embedding, text, grapes, keywords in zip(
+            wines, embeddings, texts, batch_grapes, batch_keywords
+        ):
+            metadata = _make_wine_metadata(
+                wine=wine,
+                text=text,
+                grapes=grapes,
+                keywords=keywords,
                 price_range=self.get_price_range(wine.price),
-                tasting_keywords=keywords
-            ).to_pinecone_metadata()
+                list_id=effective_list_id,
+                list_ids=list_ids,
+                content_hash=self._content_hash(text, list_ids, write_master_copy, producers_namespace)
+            )
 
             vector_id = f"{effective_list_id}_{wine.qr_id}_{wine.wine_id}"
             vectors.append({
@@ -297,46 +781,47 @@ class EmbeddingPipeline:
                 "metadata": metadata
             })
 
-            if also_add_to_master:
-                master_metadata = WineEmbedding(
-                    wine_id=wine.wine_id,
-                    qr_id=wine.qr_id,
-                    list_id=self.master_list_id,
-                    producer=wine.producer,
-                    region=wine.region,
-                    grapes=",".join(wine.grapes),
-                    wine_type=wine.wine_type.value,
-                    price_range=self.get_price_range(wine.price),
-                    tasting_keywords=keywords
-                ).to_pinecone_metadata()
+            if write_master_copy:
                 master_vector_id = f"{self.master_list_id}_{wine.qr_id}_{wine.wine_id}"
                 vectors.append({
                     "id": master_vector_id,
                     "values": embedding,
-                    "metadata": master_metadata
+                    "metadata": {**metadata, "list_id": self.master_list_id}
                 })
 
         return vectors
 
+    @staticmethod
+    def _producer_vector_id(wine: Wine, list_id_bytes: bytes) -> str:
+        # Same bytes as the old "a|b|..." f-string, so producer IDs are unchanged
+        key = b"|".join([
+            wine.producer.encode("utf-8"),
+            (wine.wine_name or "").encode("utf-8"),
+            wine.region.encode("utf-8"),
+            wine.country.encode("utf-8"),
+            wine.qr_id.encode("utf-8"),
+            list_id_bytes,
+        ])
+        return f"producer_{hashlib.md5(key, usedforsecurity=False).hexdigest()}"
+
     def _build_producer_vectors(
         self,
         wines: List[Wine],
         embeddings: List[List[float]],
+        texts: List[str],
+        batch_grapes: List[str],
         list_id: Optional[str]
     ) -> List[Dict]:
         vectors = []
         effective_list_id = list_id or (wines[0].qr_id if wines else "")
-        for wine, embedding in zip(wines, embeddings):
-            text = self.generate_wine_text(wine)
-            producer_id = hashlib.md5(
-                f"{wine.producer}|{wine.wine_name or ''}|{wine.region}|{wine.country}|{wine.qr_id}|{effective_list_id}".encode("utf-8")
-            ).hexdigest()
+        list_id_bytes = effective_list_id.encode("utf-8")
+        for wine, embedding, text, grapes in zip(wines, embeddings, texts, batch_grapes):
             metadata = {
                 "producer": wine.producer,
                 "wine_name": wine.wine_name or "",
                 "region": wine.region,
                 "country": wine.country,
-                "grapes": ",".join(wine.grapes),
+                "grapes": grapes,
                 "wine_type": wine.wine_type.value,
                 "tasting_note": wine.tasting_note,
                 "price": wine.price,
@@ -347,7 +832,7 @@ class EmbeddingPipeline:
                 "text": text
             }
             vectors.append({
-                "id": f"producer_{producer_id}",
+                "id": self._producer_vector_id(wine, list_id_bytes),
                 "values": embedding,
                 "metadata": metadata
             })
@@ -360,7 +845,8 @@ class EmbeddingPipeline:
         list_id: Optional[str] = None,
         top_k: int = 5,
         filters: Dict = None,
-        namespace: Optional[str] = None
+        namespace: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Tuple[str, float, Dict]]:
         """
         Search for similar wines based on query text.
@@ -370,18 +856,27 @@ class EmbeddingPipeline:
             qr_id: Filter to specific business
             top_k: Number of results to return
             filters: Additional metadata filters
+            query_embedding: Precomputed embedding of query_text (skips the API call)
             
         Returns:
             List of (wine_id, score, metadata) tuples
         """
         # Generate embedding for query
-        query_embedding = self.get_embeddings([query_text])[0]
+        if query_embedding is None:
+            query_embedding = self.get_embeddings([query_text])[0]
         
         # Build filter
         query_filter: Dict = {}
         effective_list_id = list_id or qr_id
         if effective_list_id:
-            query_filter["list_id"] = effective_list_id
+            if settings.master_dual_write:
+                query_filter["list_id"] = effective_list_id
+            else:
+                # Vectors written before list_ids existed only carry list_id
+                query_filter["$or"] = [
+                    {"list_ids": {"$in": [effective_list_id]}},
+                    {"list_id": effective_list_id},
+                ]
         if qr_id and list_id:
             query_filter["qr_id"] = qr_id
         if filters:
@@ -456,6 +951,21 @@ class EmbeddingPipeline:
         logger.info(f"Deleted embeddings for {qr_id}")
 
 
+_pipeline_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _build_pipeline() -> EmbeddingPipeline:
+    return EmbeddingPipeline()
+
+
+def get_pipeline() -> EmbeddingPipeline:
+    """Return the process-wide EmbeddingPipeline, constructing it on first use."""
+    # lru_cache alone can run the constructor twice under concurrent first calls
+    with _pipeline_lock:
+        return _build_pipeline()
+
+
 def embed_sample_business():
     """Example function to embed a sample business's wines."""
     pipeline = EmbeddingPipeline()
@@ -5,8 +5,11 @@ then embeds into Pinecone with a dedicated list_id and master list entry.
 """
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
+import csv
+import itertools
 import logging
 import re
 
@@ -14,7 +17,7 @@ import pandas as pd
 import pdfplumber
 
 from data.wine_data_loader import WineDataLoader
-from data.embedding_pipeline import EmbeddingPipeline
+from data.embedding_pipeline import get_pipeline
 
 logger = logging.getLogger(__name__)
 
@@ -33,129 +36,156 @@ STANDARD_COLUMNS = [
 
 REQUIRED_COLUMNS = {"producer", "region", "country", "price", "wine_type"}
 
-
-def extract_tables(pdf_path: Path) -> List[pd.DataFrame]:
-    """Extract tables from a PDF using pdfplumber."""
-    tables: List[pd.DataFrame] = []
+HEADER_KEYWORDS = frozenset({"producer", "wine", "vintage", "price", "region"})
+
+_NUM_RE = re.compile(r"\d+(?:\.\d+)?")
+_VINTAGE_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+_WS_RE = re.compile(r"\s+")
+
+COLUMN_ALIASES = {
+    "winename": "wine_name",
+    "wine": "wine_name",
+    "winetype": "wine_type",
+    "type": "wine_type",
+    "varietal": "grapes",
+    "varietals": "grapes",
+    "variety": "grapes",
+    "grape": "grapes",
+    "notes": "tasting_note",
+    "tastingnotes": "tasting_note",
+    "description": "tasting_note",
+    "abv": "alcohol_content",
+    "alcohol": "alcohol_content",
+}
+
+
+def extract_tables(pdf_path: Path) -> Iterator[Tuple[List[Optional[str]], List[List[Optional[str]]]]]:
+    """Yield tables from a PDF using pdfplumber, as (first_row, remaining_rows) pairs."""
     with pdfplumber.open(pdf_path) as pdf:
         for page in pdf.pages:
             page_tables = page.extract_tables()
+            # Drop the page's cached layout objects so memory stays flat across pages
+            page.close()
             for table in page_tables:
                 if not table or len(table) < 2:
                     continue
-                df = pd.DataFrame(table)
-                tables.append(df)
-    return tables
+                yield table[0], table[1:]
 
 
-def normalize_headers(df: pd.DataFrame) -> pd.DataFrame:
+def normalize_headers(
+    header: List[Optional[str]],
+    rows: List[List[Optional[str]]]
+) -> Tuple[List[str], List[List[Optional[str]]]]:
     """Use first row as header if it looks like a header row."""
-    header_candidates = df.iloc[0].fillna("").astype(str).str.lower().tolist()
-    header_text = " ".join(header_candidates)
-    if any(key in header_text for key in ["producer", "wine", "vintage", "price", "region"]):
-        df = df[1:].copy()
-        df.columns = header_candidates
-    return df
-
-
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Normalize column names and align to standard schema."""
-    def slugify(value: str) -> str:
-        return re.sub(r"[^a-z0-9]", "", str(value).lower())
-
-    df = df.rename(columns={col: slugify(col) for col in df.columns})
-
-    aliases = {
-        "winename": "wine_name",
-        "wine": "wine_name",
-        "winetype": "wine_type",
-        "type": "wine_type",
-        "varietal": "grapes",
-        "varietals": "grapes",
-        "variety": "grapes",
-        "grape": "grapes",
-        "notes": "tasting_note",
-        "tastingnotes": "tasting_note",
-        "description": "tasting_note",
-        "abv": "alcohol_content",
-        "alcohol": "alcohol_content",
-    }
-    df = df.rename(columns={col: aliases.get(col, col) for col in df.columns})
+    header_candidates = ["" if cell is None else str(cell).lower() for cell in header]
+    # Exact cell matches short-circuit; the substring scan still catches "wine name", "price ($)"
+    stripped = {cell.strip() for cell in header_candidates}
+    if not HEADER_KEYWORDS.isdisjoint(stripped) or any(
+        key in cell for cell in header_candidates for key in HEADER_KEYWORDS
+    ):
+        return header_candidates, rows
+    # Not a header: keep it as data under positional column names
+    return [str(i) for i in range(len(header))], [header] + rows
 
-    for col in STANDARD_COLUMNS:
-        if col not in df.columns:
-            df[col] = ""
 
-    return df[STANDARD_COLUMNS]
+def standardize_column_name(column: str) -> str:
+    """Slugify a raw column name and resolve known aliases."""
+    slug = re.sub(r"[^a-z0-9]", "", str(column).lower())
+    return COLUMN_ALIASES.get(slug, slug)
 
 
 def export_maass_to_csv(pdf_path: Path, csv_path: Path) -> Path:
     """Extract tables from the MAASS PDF and export a normalized CSV."""
     tables = extract_tables(pdf_path)
-    if not tables:
+    first_table = next(tables, None)
+    if first_table is None:
         raise ValueError("No tables detected in PDF; provide a CSV/XLSX instead.")
 
-    normalized_tables = []
-    for table in tables:
-        table = normalize_headers(table)
-        normalized_tables.append(normalize_columns(table))
+    # Stream each table's rows, projected onto STANDARD_COLUMNS, straight to disk
+    with open(csv_path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle, lineterminator="\n")
+        writer.writerow(STANDARD_COLUMNS)
+        for header, body in itertools.chain([first_table], tables):
+            columns, body = normalize_headers(header, body)
+            positions = {}
+            for i, column in enumerate(columns):
+                positions.setdefault(standardize_column_name(column), i)
+            picks = [positions.get(column) for column in STANDARD_COLUMNS]
+            writer.writerows([row[i] if i is not None else "" for i in picks] for row in body)
 
-    combined = pd.concat(normalized_tables, ignore_index=True)
-    combined.to_csv(csv_path, index=False)
     logger.info("Exported normalized CSV to %s", csv_path)
     return csv_path
 
 
+def _read_excel(path: Path, **kwargs) -> pd.DataFrame:
+    """Read a workbook with the Rust calamine engine, falling back to openpyxl."""
+    try:
+        return pd.read_excel(path, engine="calamine", **kwargs)
+    except ImportError:
+        logger.debug("python-calamine not installed; reading %s with openpyxl", path)
+        return pd.read_excel(path, **kwargs)
+
+
+@lru_cache(maxsize=1024)
+def _word_re(token: str) -> re.Pattern:
+    """Compiled whole-word pattern for a literal token (prices/vintages repeat across rows)."""
+    return re.compile(rf"\b{re.escape(token)}\b")
+
+
+def _parse_raw_row(values: tuple) -> Optional[dict]:
+    """Parse one raw XLSX row into a standard record, or None if it has no wine."""
+    cells = [str(cell).strip() for cell in values if pd.notna(cell) and str(cell).strip()]
+    if not cells:
+        return None
+
+    raw_text = " ".join(cells)
+    numbers = _NUM_RE.findall(raw_text)
+    price = float(numbers[-1]) if numbers else None
+
+    vintage_match = _VINTAGE_RE.findall(raw_text)
+    vintage = None
+    if vintage_match:
+        vintage = int(vintage_match[-1])
+
+    cleaned = raw_text
+    if price is not None:
+        cleaned = _word_re(str(int(price))).sub("", cleaned)
+        cleaned = _word_re(str(price)).sub("", cleaned)
+    if vintage is not None:
+        cleaned = _word_re(str(vintage)).sub("", cleaned)
+    cleaned = _WS_RE.sub(" ", cleaned).strip(" -")
+
+    if "," in cleaned:
+        producer, wine_name = cleaned.split(",", 1)
+        producer = producer.strip()
+        wine_name = wine_name.strip()
+    else:
+        producer = cleaned.strip()
+        wine_name = ""
+
+    if not producer or price is None:
+        return None
+
+    return {
+        "producer": producer,
+        "wine_name": wine_name,
+        "region": "unknown",
+        "country": "unknown",
+        "vintage": vintage or "",
+        "price": price,
+        "grapes": "",
+        "wine_type": "unknown",
+        "tasting_note": "",
+        "alcohol_content": "",
+    }
+
+
 def normalize_xlsx_to_csv(xlsx_path: Path, csv_path: Path) -> Path:
     """Normalize a raw XLSX export into a structured CSV."""
-    df = pd.read_excel(xlsx_path, header=None)
-
-    records = []
-    for _, row in df.iterrows():
-        cells = [str(cell).strip() for cell in row.tolist() if pd.notna(cell) and str(cell).strip()]
-        if not cells:
-            continue
-
-        raw_text = " ".join(cells)
-        numbers = re.findall(r"\d+(?:\.\d+)?", raw_text)
-        price = float(numbers[-1]) if numbers else None
-
-        vintage_match = re.findall(r"\b(19|20)\d{2}\b", raw_text)
-        vintage = None
-        if vintage_match:
-            vintage = int(vintage_match[-1])
-
-        cleaned = raw_text
-        if price is not None:
-            cleaned = re.sub(rf"\b{re.escape(str(int(price)))}\b", "", cleaned)
-            cleaned = re.sub(rf"\b{re.escape(str(price))}\b", "", cleaned)
-        if vintage is not None:
-            cleaned = re.sub(rf"\b{vintage}\b", "", cleaned)
-        cleaned = re.sub(r"\s+", " ", cleaned).strip(" -")
-
-        if "," in cleaned:
-            producer, wine_name = cleaned.split(",", 1)
-            producer = producer.strip()
-            wine_name = wine_name.strip()
-        else:
-            producer = cleaned.strip()
-            wine_name = ""
-
-        if not producer or price is None:
-            continue
-
-        records.append({
-            "producer": producer,
-            "wine_name": wine_name,
-            "region": "unknown",
-            "country": "unknown",
-            "vintage": vintage or "",
-            "price": price,
-            "grapes": "",
-            "wine_type": "unknown",
-            "tasting_note": "",
-            "alcohol_content": "",
-        })
+    df = _read_excel(xlsx_path, header=None)
+
+    parsed = (_parse_raw_row(values) for values in df.itertuples(index=False, name=None))
+    records = [record for record in parsed if record is not None]
 
     normalized = pd.DataFrame(records, columns=STANDARD_COLUMNS)
     normalized.to_csv(csv_path, index=False)
@@ -180,7 +210,7 @@ def ingest_maass_list(
     if source_path.suffix.lower() == ".pdf":
         export_maass_to_csv(source_path, csv_path)
     elif source_path.suffix.lower() in {".xlsx", ".xls"}:
-        raw_df = pd.read_excel(source_path)
+        raw_df = _read_excel(source_path)
         
         # Check if file is already in correct format
         expected_cols = {"Producer", "Label", "Region", "Country", "Grapes", "Major Region"}
@@ -221,7 +251,7 @@ def ingest_maass_list(
 
     qr_id = f"qr_{business_id}"
     effective_list_id = list_id or namespace
-    pipeline = EmbeddingPipeline()
+    pipeline = get_pipeline()
 
     try:
         loader = WineDataLoader()
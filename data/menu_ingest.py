@@ -13,37 +13,93 @@ import logging
 import re
 import uuid
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import pandas as pd
 import pdfplumber
 
+from data.convert_pdf_to_xlsx import map_pdf_pages
 from data.menu_schema import MenuDish
 from data.embedding_pipeline import EmbeddingPipeline
 
 logger = logging.getLogger(__name__)
 
+_SLUG_RE = re.compile(r"[^a-z0-9]")
+# A first table row mentioning any of these is treated as the header
+_HEADER_RE = re.compile(r"name|dish|item|description|price|category")
+# Slugged column names -> standard menu schema
+_COL_ALIASES = {
+    "dish": "name",
+    "dishname": "name",
+    "item": "name",
+    "itemname": "name",
+    "title": "name",
+    "desc": "description",
+    "ingredients": "description",
+    "details": "description",
+    "section": "category",
+    "type": "category",
+    "course": "category",
+}
+# Common bullet characters
+_BULLET_STRIP = "•·●▪◆◇■□–—"
+# Whole menu line: optional leading bullets, body, and an optional trailing
+# price such as "24" or "$24.50" (the lazy body stops where the price starts)
+_LINE_RE = re.compile(
+    rf"^(?P<bullet>[{re.escape(_BULLET_STRIP)}]+\s*)?"
+    r"(?P<body>.*?)(?:\$?\s*(?P<price>\d+(?:\.\d{2})?))?\s*$"
+)
+
 
 # ---------------------------------------------------------------------------
 # PDF extraction
 # ---------------------------------------------------------------------------
 
+def _extract_menu_pages(args: Tuple[Path, int, int]) -> Tuple[List[List[List[str]]], List[str]]:
+    """Extract tables from a block of pages, plus text lines when the block has none."""
+    # pdfplumber objects are not picklable, so each worker opens its own handle
+    pdf_path, start, stop = args
+    tables: List[List[List[str]]] = []
+    lines: List[str] = []
+    with pdfplumber.open(pdf_path, pages=list(range(start + 1, stop + 1))) as pdf:
+        for page in pdf.pages:
+            # The default "lines" strategy needs ruling edges to find any table
+            if page.lines or page.rects or page.curves:
+                for found in page.find_tables():
+                    # Row count is known before the cell text is extracted
+                    if len(found.rows) < 2:
+                        continue
+                    tables.append(found.extract())
+            # Once the block has a table its text is never read, so free the page
+            if tables:
+                page.close()
+
+        # Text is only used when the whole document has no tables
+        if not tables:
+            for page in pdf.pages:
+                # Image-only pages have no chars; skip text assembly but keep
+                # the blank line extract_text() would give as a page break
+                if not page.chars:
+                    lines.append("")
+                else:
+                    text = page.extract_text() or ""
+                    lines.extend(text.split("\n"))
+                page.close()
+    return tables, lines
+
+
 def extract_menu_from_pdf(pdf_path: Path) -> pd.DataFrame:
     """Extract menu items from a PDF.
 
     Attempts table extraction first, then falls back to text parsing
-    if no tables are detected.
+    if no tables are detected. Pages are processed in parallel blocks.
     """
     tables: List[pd.DataFrame] = []
+    all_lines: List[str] = []
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            page_tables = page.extract_tables()
-            for table in page_tables:
-                if not table or len(table) < 2:
-                    continue
-                df = pd.DataFrame(table)
-                tables.append(df)
+    for block_tables, block_lines in map_pdf_pages(_extract_menu_pages, pdf_path):
+        tables.extend(pd.DataFrame(table) for table in block_tables)
+        all_lines.extend(block_lines)
 
     if tables:
         combined = pd.concat(tables, ignore_index=True)
@@ -52,38 +108,34 @@ def extract_menu_from_pdf(pdf_path: Path) -> pd.DataFrame:
 
     # Fallback: parse raw text line-by-line
     logger.info("No tables found in PDF; falling back to text extraction")
-    return _parse_menu_text_from_pdf(pdf_path)
+    return _parse_menu_text(all_lines)
 
 
-def _parse_menu_text_from_pdf(pdf_path: Path) -> pd.DataFrame:
-    """Parse menu items from raw PDF text when tables aren't detected.
+def _parse_menu_text(all_lines: List[str]) -> pd.DataFrame:
+    """Parse menu items from raw PDF text lines when tables aren't detected.
 
     Handles two common formats:
     1. Bullet-style menus (e.g., "• Dish Name" on one line, description on next)
     2. Single-line menus with optional trailing prices
     """
     records: List[dict] = []
-    # Common bullet characters
-    bullet_chars = {"•", "·", "●", "▪", "◆", "◇", "■", "□", "–", "—"}
-
-    with pdfplumber.open(pdf_path) as pdf:
-        all_lines: List[str] = []
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            all_lines.extend(text.split("\n"))
+    lines = [line.strip() for line in all_lines]
+    # One scan per line tags its bullet, body and trailing price
+    matches = [_LINE_RE.match(line) for line in lines]
 
     current_category = ""
     i = 0
-    while i < len(all_lines):
-        line = all_lines[i].strip()
+    while i < len(lines):
+        line = lines[i]
+        match = matches[i]
         i += 1
 
         if not line:
             continue
 
-        # Strip leading bullet characters
-        stripped = line.lstrip("".join(bullet_chars)).strip()
-        has_bullet = stripped != line.strip()
+        # Text after any leading bullet characters
+        stripped = line[match.start("body"):]
+        has_bullet = match.group("bullet") is not None
 
         # Detect category headers: short lines, no bullet, title-cased
         # (e.g., "Snacks", "Starters", "Sweets", "Main Courses")
@@ -98,20 +150,16 @@ def _parse_menu_text_from_pdf(pdf_path: Path) -> pd.DataFrame:
 
         # If this line has a bullet, it's a dish name
         if has_bullet:
-            dish_name = stripped
-
-            # Try to extract a trailing price from the dish name line
-            price_match = re.search(r"\$?\s*(\d+(?:\.\d{2})?)\s*$", dish_name)
-            price = float(price_match.group(1)) if price_match else None
-            if price_match:
-                dish_name = dish_name[: price_match.start()].strip()
+            # Split off a trailing price from the dish name line
+            price = float(match.group("price")) if match.group("price") else None
+            dish_name = match.group("body").strip() if price is not None else stripped
 
             # Look ahead: next non-empty line without a bullet is the description
             description = ""
-            if i < len(all_lines):
-                next_line = all_lines[i].strip()
-                next_stripped = next_line.lstrip("".join(bullet_chars)).strip()
-                next_has_bullet = next_stripped != next_line.strip()
+            if i < len(lines):
+                next_line = lines[i]
+                next_match = matches[i]
+                next_has_bullet = next_match.group("bullet") is not None
 
                 # Description lines don't start with a bullet and are either
                 # lowercase or start with punctuation (e.g., quotes)
@@ -124,11 +172,9 @@ def _parse_menu_text_from_pdf(pdf_path: Path) -> pd.DataFrame:
                 if is_description:
                     description = next_line
                     # Check for price on description line
-                    if price is None:
-                        price_match = re.search(r"\$?\s*(\d+(?:\.\d{2})?)\s*$", description)
-                        if price_match:
-                            price = float(price_match.group(1))
-                            description = description[: price_match.start()].strip()
+                    if price is None and next_match.group("price"):
+                        price = float(next_match.group("price"))
+                        description = next_match.group("body").strip()
                     i += 1  # consume the description line
 
             records.append({
@@ -141,11 +187,10 @@ def _parse_menu_text_from_pdf(pdf_path: Path) -> pd.DataFrame:
 
         # Fallback for non-bullet lines that look like dish entries
         # (e.g., lines with a trailing price)
-        price_match = re.search(r"\$?\s*(\d+(?:\.\d{2})?)\s*$", stripped)
-        price = float(price_match.group(1)) if price_match else None
+        price = float(match.group("price")) if match.group("price") else None
         name_part = stripped
-        if price_match:
-            name_part = stripped[: price_match.start()].strip().rstrip("-–—.")
+        if price is not None:
+            name_part = match.group("body").strip().rstrip("-–—.")
 
         if name_part and len(name_part) > 3:
             for sep in [" - ", " – ", ": "]:
@@ -174,9 +219,17 @@ def load_menu_from_file(file_path: Path) -> pd.DataFrame:
     """Load a menu from CSV or XLSX."""
     suffix = file_path.suffix.lower()
     if suffix == ".csv":
-        df = pd.read_csv(file_path)
+        try:
+            df = pd.read_csv(file_path, engine="pyarrow")
+        except ImportError:
+            logger.debug("pyarrow not installed; reading %s with the C parser", file_path)
+            df = pd.read_csv(file_path)
     elif suffix in {".xlsx", ".xls"}:
-        df = pd.read_excel(file_path)
+        try:
+            df = pd.read_excel(file_path, engine="calamine")
+        except ImportError:
+            logger.debug("python-calamine not installed; reading %s with openpyxl", file_path)
+            df = pd.read_excel(file_path)
     else:
         raise ValueError(f"Unsupported file format: {suffix}")
 
@@ -190,8 +243,7 @@ def load_menu_from_file(file_path: Path) -> pd.DataFrame:
 def _normalize_menu_headers(df: pd.DataFrame) -> pd.DataFrame:
     """Promote first row to header if it looks like one."""
     first_row = df.iloc[0].fillna("").astype(str).str.lower().tolist()
-    joined = " ".join(first_row)
-    if any(kw in joined for kw in ["name", "dish", "item", "description", "price", "category"]):
+    if _HEADER_RE.search(" ".join(first_row)):
         df = df[1:].copy()
         df.columns = first_row
     return df
@@ -199,29 +251,21 @@ def _normalize_menu_headers(df: pd.DataFrame) -> pd.DataFrame:
 
 def _normalize_menu_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Normalise column names to the standard menu schema."""
-    slug = lambda v: re.sub(r"[^a-z0-9]", "", str(v).lower())
-    df = df.rename(columns={col: slug(col) for col in df.columns})
-
-    aliases = {
-        "dish": "name",
-        "dishname": "name",
-        "item": "name",
-        "itemname": "name",
-        "title": "name",
-        "desc": "description",
-        "ingredients": "description",
-        "details": "description",
-        "section": "category",
-        "type": "category",
-        "course": "category",
-    }
-    df = df.rename(columns={col: aliases.get(col, col) for col in df.columns})
-
-    for col in ["name", "description", "category", "price"]:
-        if col not in df.columns:
-            df[col] = "" if col != "price" else None
-
-    return df[["name", "description", "category", "price"]]
+    columns = ["name", "description", "category", "price"]
+
+    # Sheets that already use the canonical headers need no renaming
+    if not set(df.columns) <= set(columns):
+        # Slug and alias in one mapping so the index is rebuilt once
+        renames = {}
+        for col in df.columns:
+            slug = _SLUG_RE.sub("", str(col).lower())
+            renames[col] = _COL_ALIASES.get(slug, slug)
+        df = df.rename(columns=renames)
+
+    for col in [col for col in columns if col not in df.columns]:
+        df[col] = "" if col != "price" else None
+
+    return df[columns]
 
 
 # ---------------------------------------------------------------------------
@@ -248,9 +292,10 @@ def ingest_menu(
     else:
         raise ValueError(f"Unsupported file format: {suffix}")
 
-    # Drop rows without a dish name
-    df = df[df["name"].astype(str).str.strip().ne("")]
-    df = df.fillna("")
+    # Normalise the text columns in one pass, then drop rows without a dish name
+    for col in ("name", "description", "category"):
+        df[col] = df[col].fillna("").astype(str).str.strip()
+    df = df[df["name"].ne("")]
 
     if df.empty:
         logger.warning("No menu items found in %s", source_path)
@@ -259,48 +304,64 @@ def ingest_menu(
     logger.info("Parsed %d menu items from %s", len(df), source_path)
 
     # ---- Build MenuDish objects ----
-    dishes: List[MenuDish] = []
-    for _, row in df.iterrows():
-        price = None
-        raw_price = row.get("price", "")
-        if raw_price not in ("", None):
-            try:
-                price = float(str(raw_price).replace("$", "").replace(",", "").strip())
-            except (ValueError, TypeError):
-                pass
-
-        dishes.append(MenuDish(
-            name=str(row["name"]).strip(),
-            description=str(row.get("description", "")).strip(),
-            category=str(row.get("category", "")).strip(),
+    # Parse prices column-wise; anything unparseable (including blanks) becomes None
+    prices = pd.to_numeric(
+        df["price"].astype(str).str.replace(r"[$,]", "", regex=True).str.strip(),
+        errors="coerce",
+    )
+    prices = prices.astype(object).where(prices.notna(), None)
+
+    # Columns are already normalised to str / float-or-None, so skip validation
+    dish_ids = [f"dish_{uuid.uuid4().hex[:8]}" for _ in range(len(df))]
+    dishes: List[MenuDish] = [
+        MenuDish.model_construct(
+            dish_id=dish_id,
+            name=name,
+            description=description,
+            category=category,
             price=price,
             restaurant_id=restaurant_id,
-        ))
+        )
+        for dish_id, name, description, category, price in zip(
+            dish_ids,
+            df["name"],
+            df["description"],
+            df["category"],
+            prices,
+        )
+    ]
 
     # ---- Embed & upsert ----
     pipeline = EmbeddingPipeline()
-    texts = [dish.to_embedding_text() for dish in dishes]
-    embeddings = pipeline.get_embeddings(texts)
-
-    vectors = []
-    for dish, embedding in zip(dishes, embeddings):
-        vectors.append({
-            "id": f"{restaurant_id}_menu_{dish.dish_id}",
-            "values": embedding,
-            "metadata": dish.to_pinecone_metadata(),
-        })
-
-    # Upsert in batches of 100
+
+    # Embed one batch at a time so only a batch of vectors is held. Upserts
+    # run on the index's own pool (pool_threads=30), overlapping with the next
+    # batch's embedding call, and are awaited together at the end.
     batch_size = 100
     total = 0
-    for i in range(0, len(vectors), batch_size):
-        batch = vectors[i : i + batch_size]
+    pending = []
+    for i in range(0, len(dishes), batch_size):
+        batch_number = i // batch_size + 1
+        chunk = dishes[i : i + batch_size]
         try:
-            pipeline.index.upsert(vectors=batch, namespace=namespace)
-            total += len(batch)
-            logger.info("Upserted batch %d: %d dishes", i // batch_size + 1, len(batch))
+            embeddings = pipeline.get_embeddings([dish.to_embedding_text() for dish in chunk])
         except Exception as e:
-            logger.error("Error upserting batch: %s", e)
+            logger.error("Error embedding batch %d: %s", batch_number, e)
+            continue
+        vectors = [
+            {
+                "id": f"{restaurant_id}_menu_{dish.dish_id}",
+                "values": embedding,
+                "metadata": dish.to_pinecone_metadata(),
+            }
+            for dish, embedding in zip(chunk, embeddings)
+        ]
+        pending.append((batch_number, pipeline.start_upsert(vectors, namespace, batch_size)))
+
+    for batch_number, wait in pending:
+        count = wait()
+        total += count
+        logger.info("Upserted batch %d: %d dishes", batch_number, count)
 
     logger.info("Successfully embedded %d menu items into namespace '%s'", total, namespace)
     return total
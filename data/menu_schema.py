@@ -19,12 +19,12 @@ class MenuDish(BaseModel):
 
     def to_embedding_text(self) -> str:
         """Generate text for embedding."""
-        parts = [self.name]
+        text = self.name
         if self.description:
-            parts.append(f"- {self.description}")
+            text = f"{text}. - {self.description}"
         if self.category:
-            parts.append(f"Category: {self.category}")
-        return ". ".join(parts)
+            text = f"{text}. Category: {self.category}"
+        return text
 
     def to_pinecone_metadata(self) -> Dict[str, Any]:
         """Convert to Pinecone metadata."""
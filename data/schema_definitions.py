@@ -6,6 +6,29 @@ from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 from datetime import datetime
 from enum import Enum
+import json
+
+try:
+    import orjson
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; fall back to the stdlib
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+try:
+    import msgpack
+except ImportError:  # only needed when settings.redis_wine_msgpack is enabled
+    msgpack = None
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise ImportError("msgpack is required for packed wine storage (pip install msgpack)")
+    return msgpack
 
 
 class WineType(str, Enum):
@@ -35,8 +58,18 @@ class PriceRange(str, Enum):
     LUXURY = "$200+"
 
 
+# Direct value -> member lookup for bulk Redis loads (skips EnumMeta.__call__)
+_WINE_TYPE_BY_VALUE: Dict[str, WineType] = {member.value: member for member in WineType}
+
+
 # ============ Redis Hash Schemas ============
 
+# Field order of the packed (msgpack array) wine representation
+_WINE_PACKED_FIELDS = (
+    "wine_id", "qr_id", "producer", "wine_name", "region", "country", "vintage",
+    "price", "grapes", "wine_type", "tasting_note", "alcohol_content",
+)
+
 class Wine(BaseModel):
     """
     Redis Key: wine:{qr_id}:{wine_id}
@@ -86,11 +119,34 @@ class Wine(BaseModel):
             vintage=int(data["vintage"]) if data.get("vintage") else None,
             price=float(data["price"]),
             grapes=data["grapes"].split(",") if data["grapes"] else [],
-            wine_type=WineType(data["wine_type"]),
+            wine_type=_WINE_TYPE_BY_VALUE[data["wine_type"]],
             tasting_note=data["tasting_note"],
             alcohol_content=float(data["alcohol_content"]) if data.get("alcohol_content") else None,
         )
 
+    def to_msgpack(self) -> bytes:
+        """Pack into a msgpack array (no field names on the wire)."""
+        return _require_msgpack().packb([
+            self.wine_id,
+            self.qr_id,
+            self.producer,
+            self.wine_name,
+            self.region,
+            self.country,
+            self.vintage,
+            self.price,
+            self.grapes,
+            self.wine_type.value,
+            self.tasting_note,
+            self.alcohol_content,
+        ], use_bin_type=True)
+    
+    @classmethod
+    def from_msgpack(cls, blob: bytes) -> "Wine":
+        """Create Wine instance from a to_msgpack() payload."""
+        values = _require_msgpack().unpackb(blob, raw=False)
+        return cls(**dict(zip(_WINE_PACKED_FIELDS, values)))
+
 
 class Business(BaseModel):
     """
@@ -156,13 +212,12 @@ class Session(BaseModel):
     
     def to_redis_hash(self) -> Dict[str, str]:
         """Convert to Redis hash format."""
-        import json
         return {
             "session_id": self.session_id,
             "business_id": self.business_id,
             "user_preferences": self.user_preferences.model_dump_json(),
-            "conversation_history": json.dumps(self.conversation_history),
-            "recommendations_shown": json.dumps(self.recommendations_shown),
+            "conversation_history": _json_dumps(self.conversation_history),
+            "recommendations_shown": _json_dumps(self.recommendations_shown),
             "created_at": self.created_at.isoformat(),
             "last_active": self.last_active.isoformat(),
         }
@@ -170,13 +225,12 @@ class Session(BaseModel):
     @classmethod
     def from_redis_hash(cls, data: Dict[str, str]) -> "Session":
         """Create Session instance from Redis hash."""
-        import json
         return cls(
             session_id=data["session_id"],
             business_id=data["business_id"],
             user_preferences=UserPreferences.model_validate_json(data["user_preferences"]),
-            conversation_history=json.loads(data["conversation_history"]),
-            recommendations_shown=json.loads(data["recommendations_shown"]),
+            conversation_history=_json_loads(data["conversation_history"]),
+            recommendations_shown=_json_loads(data["recommendations_shown"]),
             created_at=datetime.fromisoformat(data["created_at"]),
             last_active=datetime.fromisoformat(data["last_active"]),
         )
@@ -233,11 +287,13 @@ class RestaurantWineEmbedding(BaseModel):
     price: Optional[float] = None
     tasting_keywords: str
     list_id: str
+    list_ids: List[str] = Field(default_factory=list)  # Every list this vector serves (e.g. + master)
     qr_id: str
     restaurant: str  # e.g., "maass"
     
     # Legacy/Traceability
     wine_id: Optional[str] = None
+    content_hash: str = ""  # Hash of the embedding text and write targets; unchanged wines skip re-ingest
     
     def to_pinecone_metadata(self) -> Dict[str, Any]:
         """Convert to Pinecone metadata format (restaurant namespace)."""
@@ -256,8 +312,10 @@ class RestaurantWineEmbedding(BaseModel):
             "price": self.price,
             "tasting_keywords": self.tasting_keywords,
             "list_id": self.list_id,
+            "list_ids": self.list_ids or [self.list_id],
             "qr_id": self.qr_id,
             "restaurant": self.restaurant,
+            "content_hash": self.content_hash,
         }
 
 
@@ -8,9 +8,69 @@ This schema defines:
 4. Embedding source conventions
 """
 import hashlib
-from typing import Optional, Dict
+from functools import lru_cache
+from typing import Iterable, List, Optional, Dict
 from dataclasses import dataclass, field
 
+import numpy as np
+import pandas as pd
+
+
+# The same wine identity recurs across namespaces (master, restaurant,
+# producers), so text and IDs are computed once per identity
+@lru_cache(maxsize=100_000)
+def _generate_text(
+    producer: str,
+    label: str,
+    grapes: str,
+    region: str,
+    major_region: str,
+    country: str
+) -> str:
+    parts = [
+        f"Producer: {producer}",
+        f"Label: {label}" if label else None,
+        f"Grapes: {grapes}",
+        f"Region: {region}",
+        f"Major Region: {major_region or region}",
+        f"Country: {country}"
+    ]
+    return " | ".join(filter(None, parts))
+
+
+@lru_cache(maxsize=100_000)
+def _generate_master_id(
+    producer: str,
+    label: str,
+    grapes: str,
+    region: str,
+    country: str
+) -> str:
+    identity = f"{producer}_{label}_{grapes}_{region}_{country}"
+    return _hash_identity(identity)
+
+
+def _hash_identity(identity: str) -> str:
+    return hashlib.md5(identity.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def generate_master_ids(df: pd.DataFrame) -> List[str]:
+    """
+    Master IDs for every row of a wine DataFrame.
+
+    Same digests as CoreWineMetadata.generate_master_id applied to each
+    row's str() values, but the identity strings are concatenated column
+    by column instead of formatted per row. A missing label column counts
+    as an empty label; missing (NaN) cells render as 'nan', as str() would.
+    """
+    label = df['label'] if 'label' in df.columns else pd.Series('', index=df.index)
+    identities = df['producer'].astype(str).str.cat(
+        [label.astype(str), df['grapes'].astype(str), df['region'].astype(str), df['country'].astype(str)],
+        sep='_',
+        na_rep='nan'
+    )
+    return [_hash_identity(identity) for identity in identities.to_numpy()]
+
 
 @dataclass
 class CoreWineMetadata:
@@ -56,15 +116,7 @@ class CoreWineMetadata:
         Generate standardized text for embedding.
         NEVER include price, tasting notes, or restaurant info.
         """
-        parts = [
-            f"Producer: {producer}",
-            f"Label: {label}" if label else None,
-            f"Grapes: {grapes}",
-            f"Region: {region}",
-            f"Major Region: {major_region or region}",
-            f"Country: {country}"
-        ]
-        return " | ".join(filter(None, parts))
+        return _generate_text(producer, label, grapes, region, major_region, country)
 
     @classmethod
     def generate_master_id(
@@ -79,8 +131,7 @@ class CoreWineMetadata:
         Generate deterministic master ID from core identity.
         Format: 32-character lowercase hex (MD5).
         """
-        identity = f"{producer}_{label}_{grapes}_{region}_{country}"
-        return hashlib.md5(identity.encode('utf-8')).hexdigest()
+        return _generate_master_id(producer, label, grapes, region, country)
 
 
 @dataclass
@@ -103,10 +154,20 @@ class RestaurantWineMetadata(CoreWineMetadata):
 
     def to_dict(self) -> Dict:
         """Convert to dictionary for Pinecone metadata."""
-        base = super().to_dict()
-        restaurant_fields = {
+        # Core fields are inlined (same order as CoreWineMetadata.to_dict) so
+        # the whole dict is built once instead of merged from two
+        metadata = {
+            "producer": self.producer,
+            "label": self.label,
+            "grapes": self.grapes,
+            "region": self.region,
+            "major_region": self.major_region or self.region,
+            "country": self.country,
+            "text": self.text,
+            "sync_version": self.sync_version,
             "price_range": self.price_range,
             "list_id": self.list_id,
+            "list_ids": [self.list_id],
             "qr_id": self.qr_id,
             "restaurant": self.restaurant,
             "tasting_keywords": self.tasting_keywords,
@@ -114,13 +175,13 @@ class RestaurantWineMetadata(CoreWineMetadata):
 
         # Add optional fields if they exist
         if self.price is not None:
-            restaurant_fields["price"] = self.price
+            metadata["price"] = self.price
         if self.vintage:
-            restaurant_fields["vintage"] = self.vintage
+            metadata["vintage"] = self.vintage
         if self.wine_type:
-            restaurant_fields["wine_type"] = self.wine_type
+            metadata["wine_type"] = self.wine_type
 
-        return {**base, **restaurant_fields}
+        return metadata
 
     @classmethod
     def generate_restaurant_id(
@@ -138,6 +199,10 @@ class RestaurantWineMetadata(CoreWineMetadata):
         return f"{restaurant}_{list_id}_{qr_id}_wine_{master_id_short}"
 
 
+_PRICE_THRESHOLDS = np.array([50, 100, 200])
+_PRICE_RANGES = np.array(["<$50", "$50-100", "$100-200", "$200+"], dtype=object)
+
+
 def get_price_range(price: float) -> str:
     """Categorize price into range bucket."""
     if price < 50:
@@ -150,19 +215,25 @@ def get_price_range(price: float) -> str:
         return "$200+"
 
 
+def get_price_ranges(prices: Iterable[float]) -> List[str]:
+    """Categorize a whole column of prices at once (same buckets as get_price_range)."""
+    buckets = np.searchsorted(_PRICE_THRESHOLDS, np.asarray(prices, dtype=float), side="right")
+    return _PRICE_RANGES[buckets].tolist()
+
+
 # Schema validation
-CORE_REQUIRED_FIELDS = {"producer", "grapes", "region", "country", "text"}
+CORE_REQUIRED_FIELDS = frozenset({"producer", "grapes", "region", "country", "text"})
 RESTAURANT_REQUIRED_FIELDS = CORE_REQUIRED_FIELDS | {"price_range", "list_id", "qr_id", "restaurant"}
 
 
 def validate_core_metadata(metadata: Dict) -> bool:
     """Validate that metadata has all required core fields."""
-    return CORE_REQUIRED_FIELDS.issubset(set(metadata.keys()))
+    return metadata.keys() >= CORE_REQUIRED_FIELDS
 
 
 def validate_restaurant_metadata(metadata: Dict) -> bool:
     """Validate that metadata has all required restaurant fields."""
-    return RESTAURANT_REQUIRED_FIELDS.issubset(set(metadata.keys()))
+    return metadata.keys() >= RESTAURANT_REQUIRED_FIELDS
 
 
 if __name__ == "__main__":
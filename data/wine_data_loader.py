@@ -3,11 +3,14 @@ Wine data loader for Wine Sommelier Agent.
 Loads business wine lists into Redis from Excel/CSV files.
 """
 import redis
+from redis.client import Pipeline
 import pandas as pd
 import logging
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional
 from pathlib import Path
-import uuid
+from functools import lru_cache
+import itertools
+import os
 import unicodedata
 
 from data.schema_definitions import Wine, Business, RedisKeys, WineType, PriceRange
@@ -16,6 +19,44 @@ from config import settings
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(__name__)
 
+# Commands queued on a Redis pipeline before it is flushed
+_PIPELINE_CHUNK = 1000
+
+# Lower-cased wine list values -> WineType (anything else is UNKNOWN)
+_WINE_TYPE_MAP = {
+    "red": WineType.RED,
+    "white": WineType.WHITE,
+    "rosé": WineType.ROSE,
+    "rose": WineType.ROSE,
+    "sparkling": WineType.SPARKLING,
+    "dessert": WineType.DESSERT,
+}
+
+# Slugified column names -> loader schema
+_COLUMN_ALIASES = {
+    "winename": "wine_name",
+    "wine": "wine_name",
+    "winetype": "wine_type",
+    "type": "wine_type",
+    "varietal": "grapes",
+    "varietals": "grapes",
+    "variety": "grapes",
+    "grape": "grapes",
+    "notes": "tasting_note",
+    "tastingnotes": "tasting_note",
+    "description": "tasting_note",
+    "abv": "alcohol_content",
+    "alcohol": "alcohol_content",
+}
+
+
+@lru_cache(maxsize=512)
+def _slugify(value: str) -> str:
+    # Only a handful of distinct headers are ever seen, so cache the NFKD pass
+    normalized = unicodedata.normalize("NFKD", value)
+    cleaned = "".join(ch for ch in normalized if ch.isalnum())
+    return cleaned.lower()
+
 
 class WineDataLoader:
     """Handles loading wine data from various sources into Redis."""
@@ -23,6 +64,7 @@ class WineDataLoader:
     def __init__(self, redis_required: bool = True):
         """Initialize Redis connection."""
         self.redis_client = None
+        self._raw_client: Optional[redis.Redis] = None
         if redis_required:
             self.redis_client = redis.Redis(
                 host=settings.redis_host,
@@ -82,17 +124,22 @@ class WineDataLoader:
             qr_code=qr_id,
             wine_list_count=len(df)
         )
-        self._store_business(business)
-        
         wines, wine_ids = self._wines_from_dataframe(df, qr_id)
         wines_loaded = 0
-        for wine in wines:
-            self._store_wine(wine)
-            wines_loaded += 1
-        
-        # Store wine list index (set of wine IDs for this business)
-        wine_list_key = RedisKeys.wine_list_index(qr_id)
-        self.redis_client.sadd(wine_list_key, *wine_ids)
+
+        # Queue writes on a pipeline: one round trip per chunk instead of per wine
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            self._store_business(business, pipe)
+            for wine in wines:
+                self._store_wine(wine, pipe)
+                wines_loaded += 1
+                if len(pipe) >= _PIPELINE_CHUNK:
+                    pipe.execute()
+
+            # Store wine list index (set of wine IDs for this business)
+            wine_list_key = RedisKeys.wine_list_index(qr_id)
+            pipe.sadd(wine_list_key, *wine_ids)
+            pipe.execute()
         
         logger.info(f"Successfully loaded {wines_loaded} wines for {business_name}")
         return wines_loaded
@@ -105,7 +152,11 @@ class WineDataLoader:
 
     def _read_wine_list(self, wine_list_file: Path) -> pd.DataFrame:
         if wine_list_file.suffix == '.xlsx':
-            df = pd.read_excel(wine_list_file)
+            try:
+                df = pd.read_excel(wine_list_file, engine="calamine")
+            except ImportError:
+                logger.debug(f"python-calamine not installed; reading {wine_list_file} with openpyxl")
+                df = pd.read_excel(wine_list_file)
         elif wine_list_file.suffix == '.csv':
             df = pd.read_csv(wine_list_file)
         else:
@@ -133,27 +184,39 @@ class WineDataLoader:
     def _wines_from_dataframe(self, df: pd.DataFrame, qr_id: str) -> tuple[List[Wine], List[str]]:
         wines: List[Wine] = []
         wine_ids: List[str] = []
-        for idx, row in df.iterrows():
+        # Pull each column out once instead of boxing every row into a Series
+        columns = [
+            self._column_values(df, key)
+            for key in (
+                "producer", "wine_name", "region", "country", "vintage",
+                "price", "grapes", "wine_type", "tasting_note", "alcohol_content",
+            )
+        ]
+        # Same 8-hex random IDs as uuid4().hex[:8], from one urandom read
+        random_hex = os.urandom(4 * len(df)).hex()
+        for (
+            idx, offset, producer, wine_name, region, country, vintage,
+            price, grapes_value, wine_type, tasting_note, alcohol_content,
+        ) in zip(df.index, range(0, len(random_hex), 8), *columns):
             try:
-                wine_id = f"wine_{uuid.uuid4().hex[:8]}"
+                wine_id = f"wine_{random_hex[offset:offset + 8]}"
                 wine_ids.append(wine_id)
 
-                grapes_value = self._get_optional_value(row, "grapes") or ""
-                grapes = [g.strip() for g in grapes_value.split(',') if g.strip()]
+                grapes = [g.strip() for g in (grapes_value or "").split(',') if g.strip()]
 
                 wine = Wine(
                     wine_id=wine_id,
                     qr_id=qr_id,
-                    producer=self._get_value(row, "producer"),
-                    wine_name=self._get_optional_value(row, "wine_name"),
-                    region=self._get_value(row, "region"),
-                    country=self._get_value(row, "country"),
-                    vintage=self._safe_int(self._get_optional_value(row, "vintage")),
-                    price=self._safe_float(self._get_value(row, "price")),
+                    producer=self._require(producer, "producer"),
+                    wine_name=wine_name,
+                    region=self._require(region, "region"),
+                    country=self._require(country, "country"),
+                    vintage=self._safe_int(vintage),
+                    price=self._safe_float(self._require(price, "price")),
                     grapes=grapes,
-                    wine_type=self._parse_wine_type(self._get_value(row, "wine_type")),
-                    tasting_note=self._get_optional_value(row, "tasting_note") or "No tasting note provided.",
-                    alcohol_content=self._safe_float(self._get_optional_value(row, "alcohol_content"))
+                    wine_type=self._parse_wine_type(self._require(wine_type, "wine_type")),
+                    tasting_note=tasting_note or "No tasting note provided.",
+                    alcohol_content=self._safe_float(alcohol_content)
                 )
                 wines.append(wine)
             except Exception as e:
@@ -163,47 +226,22 @@ class WineDataLoader:
 
     def _normalize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """Normalize column names and common aliases for predictable access."""
-        normalized = {col: self._slugify(col) for col in df.columns}
-        df = df.rename(columns=normalized)
-
-        aliases = {
-            "winename": "wine_name",
-            "wine": "wine_name",
-            "winetype": "wine_type",
-            "type": "wine_type",
-            "varietal": "grapes",
-            "varietals": "grapes",
-            "variety": "grapes",
-            "grape": "grapes",
-            "notes": "tasting_note",
-            "tastingnotes": "tasting_note",
-            "description": "tasting_note",
-            "abv": "alcohol_content",
-            "alcohol": "alcohol_content",
-        }
-        df = df.rename(columns={col: aliases.get(col, col) for col in df.columns})
-        return df
-
-    def _slugify(self, value: str) -> str:
-        normalized = unicodedata.normalize("NFKD", str(value))
-        cleaned = "".join(ch for ch in normalized if ch.isalnum())
-        return cleaned.lower()
+        renames = {}
+        for col in df.columns:
+            slug = _slugify(str(col))
+            renames[col] = _COLUMN_ALIASES.get(slug, slug)
+        return df.rename(columns=renames)
 
-    def _get_value(self, row: pd.Series, key: str) -> str:
-        if key not in row:
+    def _column_values(self, df: pd.DataFrame, key: str) -> List[Optional[str]]:
+        """Return a column as stripped strings, with None for missing cells."""
+        if key not in df.columns:
             raise KeyError(f"Missing required column: {key}")
-        value = row.get(key)
-        if pd.isna(value):
-            raise ValueError(f"Missing required value for: {key}")
-        return str(value).strip()
+        return [None if pd.isna(value) else str(value).strip() for value in df[key].tolist()]
 
-    def _get_optional_value(self, row: pd.Series, key: str) -> Optional[str]:
-        if key not in row:
-            return None
-        value = row.get(key)
-        if pd.isna(value):
-            return None
-        return str(value).strip()
+    def _require(self, value: Optional[str], key: str) -> str:
+        if value is None:
+            raise ValueError(f"Missing required value for: {key}")
+        return value
 
     def _safe_float(self, value: Optional[str]) -> Optional[float]:
         if value is None or value == "":
@@ -222,32 +260,27 @@ class WineDataLoader:
             return None
 
     def _parse_wine_type(self, value: str) -> WineType:
-        normalized = value.strip().lower()
-        normalized = normalized.replace("rose", "rosé")
-        mapping = {
-            "red": WineType.RED,
-            "white": WineType.WHITE,
-            "rosé": WineType.ROSE,
-            "rose": WineType.ROSE,
-            "sparkling": WineType.SPARKLING,
-            "dessert": WineType.DESSERT,
-        }
-        return mapping.get(normalized, WineType.UNKNOWN)
+        return _WINE_TYPE_MAP.get(value.strip().lower(), WineType.UNKNOWN)
     
-    def _store_business(self, business: Business) -> None:
-        """Store business data in Redis."""
+    def _store_business(self, business: Business, pipe: Optional[Pipeline] = None) -> None:
+        """Store business data in Redis (queued on pipe if given)."""
         if not self.redis_client:
             raise RuntimeError("Redis client is not initialized.")
         key = RedisKeys.business(business.business_id)
-        self.redis_client.hset(key, mapping=business.to_redis_hash())
+        client = pipe if pipe is not None else self.redis_client
+        client.hset(key, mapping=business.to_redis_hash())
         logger.debug(f"Stored business: {business.business_id}")
     
-    def _store_wine(self, wine: Wine) -> None:
-        """Store wine data in Redis."""
+    def _store_wine(self, wine: Wine, pipe: Optional[Pipeline] = None) -> None:
+        """Store wine data in Redis (queued on pipe if given)."""
         if not self.redis_client:
             raise RuntimeError("Redis client is not initialized.")
         key = RedisKeys.wine(wine.qr_id, wine.wine_id)
-        self.redis_client.hset(key, mapping=wine.to_redis_hash())
+        client = pipe if pipe is not None else self.redis_client
+        if settings.redis_wine_msgpack:
+            client.set(key, wine.to_msgpack())
+        else:
+            client.hset(key, mapping=wine.to_redis_hash())
         logger.debug(f"Stored wine: {wine.wine_id}")
     
     def get_business_wines(self, qr_id: str) -> List[Wine]:
@@ -263,17 +296,82 @@ class WineDataLoader:
         if not self.redis_client:
             raise RuntimeError("Redis client is not initialized.")
 
-        wine_list_key = RedisKeys.wine_list_index(qr_id)
-        wine_ids = self.redis_client.smembers(wine_list_key)
+        return list(self.stream_business_wines(qr_id))
+
+    def stream_business_wines(self, qr_id: str) -> Iterator[Wine]:
+        """
+        Yield a business's wines one at a time.
         
-        wines = []
-        for wine_id in wine_ids:
-            key = RedisKeys.wine(qr_id, wine_id)
-            wine_data = self.redis_client.hgetall(key)
-            if wine_data:
-                wines.append(Wine.from_redis_hash(wine_data))
+        Walks the wine index with SSCAN, so the full ID set is never
+        loaded at once, and fetches each chunk of wines in one pipelined
+        round trip.
         
+        Args:
+            qr_id: QR code identifier for the business
+            
+        Yields:
+            Wine objects
+        """
+        if not self.redis_client:
+            raise RuntimeError("Redis client is not initialized.")
+
+        wine_list_key = RedisKeys.wine_list_index(qr_id)
+        wine_ids = self.redis_client.sscan_iter(wine_list_key)
+        while chunk := list(itertools.islice(wine_ids, _PIPELINE_CHUNK)):
+            yield from self._fetch_wines([RedisKeys.wine(qr_id, wine_id) for wine_id in chunk])
+
+    def _fetch_wines(self, keys: List[str]) -> List[Wine]:
+        """Fetch wines in pipelined round trips, reading packed and hash storage."""
+        blobs: List[Any] = [None] * len(keys)
+        legacy_keys = keys
+        if settings.redis_wine_msgpack:
+            blobs = self._get_packed(keys)
+            # Wines stored before packing was enabled are hashes (GET -> WRONGTYPE)
+            legacy_keys = [
+                key for key, blob in zip(keys, blobs) if isinstance(blob, redis.ResponseError)
+            ]
+
+        hashes: Dict[str, Any] = {}
+        if legacy_keys:
+            with self.redis_client.pipeline(transaction=False) as pipe:
+                for key in legacy_keys:
+                    pipe.hgetall(key)
+                hashes = dict(zip(legacy_keys, pipe.execute(raise_on_error=False)))
+
+        if not settings.redis_wine_msgpack:
+            # Wines packed while the flag was on are strings (HGETALL -> WRONGTYPE)
+            packed_keys = [
+                key for key, data in hashes.items() if isinstance(data, redis.ResponseError)
+            ]
+            if packed_keys:
+                packed = dict(zip(packed_keys, self._get_packed(packed_keys)))
+                blobs = [packed.get(key) for key in keys]
+
+        wines: List[Wine] = []
+        for key, blob in zip(keys, blobs):
+            if isinstance(blob, bytes):
+                wines.append(Wine.from_msgpack(blob))
+            elif isinstance(hashes.get(key), dict) and hashes[key]:
+                wines.append(Wine.from_redis_hash(hashes[key]))
         return wines
+
+    def _get_packed(self, keys: List[str]) -> List[Any]:
+        """GET keys through the binary client; errors are returned, not raised."""
+        with self._binary_client().pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.get(key)
+            return pipe.execute(raise_on_error=False)
+
+    def _binary_client(self) -> redis.Redis:
+        """Client without response decoding (packed wines are not UTF-8 text)."""
+        if self._raw_client is None:
+            self._raw_client = redis.Redis(
+                host=settings.redis_host,
+                port=settings.redis_port,
+                db=settings.redis_db,
+                password=settings.redis_password,
+            )
+        return self._raw_client
     
     def get_business(self, business_id: str) -> Optional[Business]:
         """
@@ -314,16 +412,19 @@ class WineDataLoader:
         wine_list_key = RedisKeys.wine_list_index(qr_id)
         wine_ids = self.redis_client.smembers(wine_list_key)
         
-        # Delete all wine records
-        for wine_id in wine_ids:
-            key = RedisKeys.wine(qr_id, wine_id)
-            self.redis_client.delete(key)
-        
-        # Delete wine list index
-        self.redis_client.delete(wine_list_key)
-        
-        # Delete business record
-        self.redis_client.delete(RedisKeys.business(business_id))
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            # Delete all wine records
+            for wine_id in wine_ids:
+                pipe.delete(RedisKeys.wine(qr_id, wine_id))
+                if len(pipe) >= _PIPELINE_CHUNK:
+                    pipe.execute()
+            
+            # Delete wine list index
+            pipe.delete(wine_list_key)
+            
+            # Delete business record
+            pipe.delete(RedisKeys.business(business_id))
+            pipe.execute()
         
         logger.info(f"Cleared {len(wine_ids)} wines for business {business_id}")
 
@@ -7,6 +7,7 @@ load_dotenv()
 
 import sys
 import logging
+from typing import Optional
 from restaurants.restaurant_config import MAASS_CONFIG
 from restaurants.wine_recommender_optimized import OptimizedWineRecommender
 
@@ -14,16 +15,22 @@ from restaurants.wine_recommender_optimized import OptimizedWineRecommender
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def debug_recommendation(query: str):
-    """Test recommendation step by step with detailed error reporting."""
+def debug_recommendation(query: str, recommender: Optional[OptimizedWineRecommender] = None):
+    """Test recommendation step by step with detailed error reporting.
+
+    Pass a recommender to reuse it across queries; one is built if omitted.
+    """
     print("\n" + "="*60)
     print(f"Debugging: '{query}'")
     print("="*60)
 
     try:
-        print("\n[Step 1] Initializing recommender...")
-        recommender = OptimizedWineRecommender(MAASS_CONFIG)
-        print("[OK] Recommender initialized")
+        if recommender is None:
+            print("\n[Step 1] Initializing recommender...")
+            recommender = OptimizedWineRecommender(MAASS_CONFIG)
+            print("[OK] Recommender initialized")
+        else:
+            print("\n[Step 1] Reusing initialized recommender")
 
         print("\n[Step 2] Searching for wines...")
         matches = recommender.pipeline.search_similar_wines(
@@ -40,9 +47,9 @@ def debug_recommendation(query: str):
             return False
 
         print("\n[Step 3] Enriching wine metadata...")
-        from concurrent.futures import ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            enriched = list(executor.map(recommender.enrich_wine_metadata, matches))
+        # Enrichment only reshapes the match metadata (no I/O), so a thread
+        # pool would add setup cost without overlapping anything
+        enriched = [recommender.enrich_wine_metadata(match) for match in matches]
         print(f"[OK] Enriched {len(enriched)} wines")
 
         # Show first wine
@@ -75,18 +82,14 @@ def debug_recommendation(query: str):
 
         print("\n[Step 5] Generating tasting notes...")
         try:
-            for wine in selected:
-                print(f"\n  Processing: {wine['producer']}...")
-
-                # Check existing tasting note
-                existing_note = wine['metadata'].get('tasting_note', '')
-                print(f"    Existing note: {existing_note[:50] if existing_note else 'None'}...")
-
-                # Get or generate tasting note
-                tasting_note = wine['metadata'].get('tasting_note', '')
-                if not tasting_note or len(tasting_note) < 20:
-                    print(f"    Generating new tasting note...")
-                    tasting_note = recommender.get_tasting_note_cached(
+            # Request all missing notes up front on the recommender's shared
+            # pool so the LLM calls overlap instead of running back to back
+            existing_notes = [wine['metadata'].get('tasting_note', '') for wine in selected]
+            note_futures = {}
+            for i, (wine, existing_note) in enumerate(zip(selected, existing_notes)):
+                if not existing_note or len(existing_note) < 20:
+                    note_futures[i] = recommender.executor.submit(
+                        recommender.get_tasting_note_cached,
                         wine['producer'],
                         wine['region'],
                         wine['wine_name'],
@@ -94,6 +97,15 @@ def debug_recommendation(query: str):
                         wine['wine_type']
                     )
 
+            for i, (wine, tasting_note) in enumerate(zip(selected, existing_notes)):
+                print(f"\n  Processing: {wine['producer']}...")
+                print(f"    Existing note: {tasting_note[:50] if tasting_note else 'None'}...")
+
+                # Use the generated note where the existing one was missing or too short
+                if i in note_futures:
+                    print(f"    Generating new tasting note...")
+                    tasting_note = note_futures[i].result()
+
                 # Ensure fallback
                 if not tasting_note or len(tasting_note) < 10:
                     tasting_note = f"A {wine['wine_type']} from {wine['region']} featuring {wine.get('grapes', 'classic varietals')}."
@@ -121,12 +133,16 @@ def debug_recommendation(query: str):
         return True
 
     except Exception as e:
-        print(f"\n[ERROR] FATAL ERROR:")
-        print(f"  {type(e).__name__}: {e}")
-        import traceback
-        traceback.print_exc()
+        _report_fatal(e)
         return False
 
+def _report_fatal(e: Exception):
+    """Print an unexpected error with its traceback."""
+    print(f"\n[ERROR] FATAL ERROR:")
+    print(f"  {type(e).__name__}: {e}")
+    import traceback
+    traceback.print_exc()
+
 if __name__ == "__main__":
     queries = [
         "light pinot noir",
@@ -134,8 +150,17 @@ if __name__ == "__main__":
         "bold red wine under $100"
     ]
 
+    # Connections and clients are set up once and shared by every query
+    print("\n[Step 1] Initializing recommender...")
+    try:
+        recommender = OptimizedWineRecommender(MAASS_CONFIG)
+    except Exception as e:
+        _report_fatal(e)
+        sys.exit(1)
+    print("[OK] Recommender initialized")
+
     for query in queries:
-        success = debug_recommendation(query)
+        success = debug_recommendation(query, recommender)
         if not success:
             print(f"\n[WARNING]  Query '{query}' FAILED")
             print("Fix this issue before trying the next query\n")
@@ -3,16 +3,28 @@ Embed schema-compliant MAASS wine list to Pinecone with proper metadata.
 Uses the new unified schema with master + restaurant namespaces.
 """
 import pandas as pd
-import hashlib
 from pathlib import Path
-from data.embedding_pipeline import EmbeddingPipeline
-from data.schema_definitions import RestaurantWineEmbedding
-from config import settings
+from data.embedding_pipeline import EmbeddingPipeline, EmbeddingError
+from data.schema_v2 import generate_master_ids
 
-def generate_master_vector_id(producer, label, grapes, region, country):
-    """Generate deterministic master vector ID (MD5 hash)."""
-    text = f"{producer}_{label or ''}_{grapes}_{region}_{country}"
-    return hashlib.md5(text.encode()).hexdigest()
+# Texts per embeddings request
+EMBED_BATCH_SIZE = 256
+# Columns read from the compliant CSV. Low-cardinality ones load as
+# categoricals, so every row shares one string object per distinct value
+CSV_COLUMNS = {
+    'producer', 'label', 'grapes', 'region', 'major_region', 'country', 'text',
+    'price_range', 'price', 'tasting_keywords', 'list_id', 'qr_id', 'restaurant'
+}
+CSV_DTYPES = {
+    'price': 'float64',
+    'region': 'category',
+    'major_region': 'category',
+    'country': 'category',
+    'price_range': 'category',
+    'list_id': 'category',
+    'qr_id': 'category',
+    'restaurant': 'category',
+}
 
 def embed_schema_compliant_maass():
     """Embed schema-compliant MAASS wine list to Pinecone."""
@@ -25,7 +37,7 @@ def embed_schema_compliant_maass():
     if not csv_path.exists():
         raise FileNotFoundError(f"{csv_path} not found. Run fix_schema_compliance.py first.")
     
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path, usecols=lambda col: col in CSV_COLUMNS, dtype=CSV_DTYPES)
     print(f"\n✓ Loaded {len(df)} wines from {csv_path}")
     print(f"  Columns: {list(df.columns)}")
     
@@ -37,68 +49,83 @@ def embed_schema_compliant_maass():
     vectors_master = []
     vectors_restaurant = []
     
+    # Embed all texts up front, one API request per batch instead of per wine.
+    # get_embeddings_cached sends each distinct text once and reads texts
+    # embedded on a previous run from the on-disk cache instead of the API.
+    print(f"\n🧠 Embedding {len(df)} wines...")
+    texts = df['text'].tolist()
+    text_batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+    embeddings = []
+    for batch_embeddings in pipeline.get_embeddings_cached(text_batches):
+        if batch_embeddings is None:
+            raise EmbeddingError("Embedding failed for part of the wine list; nothing was upserted.")
+        embeddings.extend(batch_embeddings)
+    
     print(f"\n📝 Preparing {len(df)} wines for embedding...")
+    master_ids = generate_master_ids(df)
+    
+    # Pull every column out once as a plain list and index them per wine;
+    # no DataFrame row objects or tuples are built inside the loop
+    n = len(df)
+    producers = df['producer'].tolist()
+    labels = df['label'].tolist() if 'label' in df.columns else [''] * n
+    grapes = df['grapes'].tolist()
+    regions = df['region'].tolist()
+    major_regions = df['major_region'].tolist() if 'major_region' in df.columns else regions
+    countries = df['country'].tolist()
+    prices = df['price'].tolist() if 'price' in df.columns else [None] * n
+    price_ranges = df['price_range'].tolist()
+    tasting_keywords = df['tasting_keywords'].tolist()
+    wine_list_ids = df['list_id'].tolist()
+    qr_ids = df['qr_id'].tolist()
+    restaurants = df['restaurant'].tolist()
     
-    for idx, row in df.iterrows():
-        # Generate master vector ID (deterministic)
-        master_id = generate_master_vector_id(
-            row['producer'],
-            row.get('label', ''),
-            row['grapes'],
-            row['region'],
-            row['country']
-        )
+    for idx in range(n):
+        master_id = master_ids[idx]
+        embedding = embeddings[idx]
         
-        # Get embedding for the text field
-        embedding = pipeline.get_embeddings([row['text']])[0]
+        # Core fields shared by the master and restaurant metadata
+        core = {
+            "producer": producers[idx],
+            "label": labels[idx],
+            "grapes": grapes[idx],
+            "region": regions[idx],
+            "major_region": major_regions[idx],
+            "country": countries[idx],
+            "text": texts[idx],
+            "sync_version": 1,
+        }
         
         # ===== MASTER NAMESPACE (core metadata only) =====
         master_vector = {
             "id": master_id,
             "values": embedding,
-            "metadata": {
-                "producer": row['producer'],
-                "label": row.get('label', ''),
-                "grapes": row['grapes'],
-                "region": row['region'],
-                "major_region": row.get('major_region', row['region']),
-                "country": row['country'],
-                "text": row['text'],
-                "sync_version": 1,
-                "source": "maass_schema_v2"
-            }
+            "metadata": {**core, "source": "maass_schema_v2"}
         }
         vectors_master.append(master_vector)
         
         # ===== RESTAURANT NAMESPACE (with restaurant-specific fields) =====
-        restaurant_vector_id = f"maass_{row['list_id']}_wine_{master_id[:8]}"
+        restaurant_vector_id = f"maass_{wine_list_ids[idx]}_wine_{master_id[:8]}"
         restaurant_vector = {
             "id": restaurant_vector_id,
             "values": embedding,
             "metadata": {
-                # Core
-                "producer": row['producer'],
-                "label": row.get('label', ''),
-                "grapes": row['grapes'],
-                "region": row['region'],
-                "major_region": row.get('major_region', row['region']),
-                "country": row['country'],
-                "text": row['text'],
-                "sync_version": 1,
+                **core,
                 # Restaurant-specific
-                "price_range": row['price_range'],
-                "price": row.get('price'),
-                "tasting_keywords": row['tasting_keywords'],
-                "list_id": row['list_id'],
-                "qr_id": row['qr_id'],
-                "restaurant": row['restaurant'],
+                "price_range": price_ranges[idx],
+                "price": prices[idx],
+                "tasting_keywords": tasting_keywords[idx],
+                "list_id": wine_list_ids[idx],
+                "list_ids": [wine_list_ids[idx]],
+                "qr_id": qr_ids[idx],
+                "restaurant": restaurants[idx],
                 "source": "maass_schema_v2"
             }
         }
         vectors_restaurant.append(restaurant_vector)
         
-        if (idx + 1) % 50 == 0 or (idx + 1) == len(df):
-            print(f"  Prepared {idx + 1}/{len(df)} wines")
+        if (idx + 1) % 50 == 0 or (idx + 1) == n:
+            print(f"  Prepared {idx + 1}/{n} wines")
     
     # Upsert to Pinecone
     print(f"\n🔼 Upserting to Pinecone index 'wineregionscrape'...")
@@ -112,28 +139,24 @@ def embed_schema_compliant_maass():
     except Exception as e:
         print(f"  Note: {e}")
     
-    # Upsert master vectors
+    # Each namespace's batches are all in flight at once, so the HTTP round
+    # trips overlap instead of running back to back
     print(f"\n  Upserting {len(vectors_master)} master vectors...")
-    for i in range(0, len(vectors_master), batch_size):
-        batch = vectors_master[i:i+batch_size]
-        pipeline.index.upsert(vectors=batch, namespace='master')
-        print(f"    ✓ Master batch {i//batch_size + 1}/{(len(vectors_master)-1)//batch_size + 1}")
+    master_upserted = pipeline.upsert_parallel(vectors_master, 'master', batch_size)
+    print(f"    ✓ {master_upserted}/{len(vectors_master)} master vectors upserted")
     
-    # Upsert restaurant vectors
     print(f"\n  Upserting {len(vectors_restaurant)} restaurant vectors...")
-    for i in range(0, len(vectors_restaurant), batch_size):
-        batch = vectors_restaurant[i:i+batch_size]
-        pipeline.index.upsert(vectors=batch, namespace='maass_wine_list')
-        print(f"    ✓ Restaurant batch {i//batch_size + 1}/{(len(vectors_restaurant)-1)//batch_size + 1}")
+    restaurant_upserted = pipeline.upsert_parallel(vectors_restaurant, 'maass_wine_list', batch_size)
+    print(f"    ✓ {restaurant_upserted}/{len(vectors_restaurant)} restaurant vectors upserted")
     
     # Verify
     print(f"\n✅ EMBEDDING COMPLETE!")
-    print(f"   Master namespace: {len(vectors_master)} vectors")
-    print(f"   maass_wine_list restaurant namespace: {len(vectors_restaurant)} vectors")
+    print(f"   Master namespace: {master_upserted} vectors")
+    print(f"   maass_wine_list restaurant namespace: {restaurant_upserted} vectors")
     print(f"   Index: wineregionscrape")
     print("\n" + "="*80)
     
-    return len(vectors_master), len(vectors_restaurant)
+    return master_upserted, restaurant_upserted
 
 if __name__ == "__main__":
     try:
@@ -2,37 +2,53 @@
 Schema compliance fix for wine lists and producers.
 Generates proper metadata with unified schema for Pinecone.
 """
+import numpy as np
 import pandas as pd
 import hashlib
 from pathlib import Path
 from data.schema_definitions import WineEmbedding, RestaurantWineEmbedding
 
-def generate_text_for_embedding(producer, label, grapes, region, major_region, country):
-    """Generate standardized text for embedding per schema."""
-    return f"Producer: {producer} | Label: {label or ''} | Grapes: {grapes} | Region: {region} | Major Region: {major_region or region} | Country: {country}"
+# Source columns each fixer actually reads; everything else is dropped on load
+MAASS_SOURCE_COLUMNS = {'producer', 'wine_name', 'grapes', 'region', 'country', 'price', 'tasting_note'}
+PRODUCER_SOURCE_COLUMNS = {'producer', 'label', 'grapes', 'region', 'major_region', 'country'}
+
+def generate_text_column(df):
+    """Build the standardized 'Producer: ... | Country: ...' embedding text for every row of df."""
+    def as_text(column):
+        # Missing cells render as 'nan'
+        return df[column].astype(str).fillna('nan')
+
+    region = as_text('region')
+    label = as_text('label') if 'label' in df.columns else ''
+    major_region = region
+    if 'major_region' in df.columns:
+        major_region = as_text('major_region')
+        major_region = major_region.mask(major_region == '', region)
+    return (
+        'Producer: ' + as_text('producer')
+        + ' | Label: ' + label
+        + ' | Grapes: ' + as_text('grapes')
+        + ' | Region: ' + region
+        + ' | Major Region: ' + major_region
+        + ' | Country: ' + as_text('country')
+    )
 
 def fix_maass_wine_list():
     """Fix MAASS wine list CSV to match schema."""
     print("\n=== FIXING MAASS WINE LIST ===")
-    df = pd.read_csv('data/raw/maass_wine_list.csv')
+    df = pd.read_csv(
+        'data/raw/maass_wine_list.csv',
+        usecols=lambda col: col in MAASS_SOURCE_COLUMNS,
+        dtype={'price': 'float64'}
+    )
     
     # Rename columns to match schema
     df['label'] = df['wine_name']
     df['major_region'] = df['region']  # Use region as major_region (can be updated later)
-    df['text'] = df.apply(
-        lambda row: generate_text_for_embedding(
-            row['producer'],
-            row.get('label', ''),
-            row['grapes'],
-            row['region'],
-            row.get('major_region'),
-            row['country']
-        ),
-        axis=1
-    )
+    df['text'] = generate_text_column(df)
     
     # Add restaurant-specific fields
-    df['price_range'] = df['price'].apply(categorize_price)
+    df['price_range'] = categorize_prices(df['price'])
     df['tasting_keywords'] = df['tasting_note'].fillna('No tasting note provided.')
     df['list_id'] = 'maass_wine_list'
     df['qr_id'] = 'qr_maass'
@@ -56,20 +72,13 @@ def fix_maass_wine_list():
 def fix_producer_list():
     """Fix producer list XLSX to match schema."""
     print("\n=== FIXING PRODUCER LIST ===")
-    df = pd.read_excel('wine_producer_scaper/producer_list_organized.xlsx')
+    df = pd.read_excel(
+        'wine_producer_scaper/producer_list_organized.xlsx',
+        usecols=lambda col: col in PRODUCER_SOURCE_COLUMNS
+    )
     
     # Generate embedding text
-    df['text'] = df.apply(
-        lambda row: generate_text_for_embedding(
-            row['producer'],
-            row.get('label', ''),
-            row['grapes'],
-            row['region'],
-            row.get('major_region'),
-            row['country']
-        ),
-        axis=1
-    )
+    df['text'] = generate_text_column(df)
     
     # Add missing optional fields
     if 'label' not in df.columns:
@@ -88,18 +97,14 @@ def fix_producer_list():
     print(f"  Columns: {list(df_fixed.columns)}")
     return df_fixed
 
-def categorize_price(price):
-    """Categorize price into range buckets."""
-    if pd.isna(price) or price == 0:
-        return "<$50"
-    if price < 50:
-        return "<$50"
-    elif price < 100:
-        return "$50–$100"
-    elif price < 200:
-        return "$100–$200"
-    else:
-        return "$200+"
+# Price buckets are closed on the left (a price of exactly 50 lands in
+# "$50–$100"); missing prices are treated as 0, i.e. "<$50"
+_PRICE_BINS = [-np.inf, 50, 100, 200, np.inf]
+_PRICE_LABELS = ["<$50", "$50–$100", "$100–$200", "$200+"]
+
+def categorize_prices(prices):
+    """Categorize a price column into range buckets (returns a categorical)."""
+    return pd.cut(prices.fillna(0), bins=_PRICE_BINS, labels=_PRICE_LABELS, right=False)
 
 def generate_master_vector_id(producer, label, grapes, region, country):
     """Generate deterministic master vector ID (MD5 hash)."""
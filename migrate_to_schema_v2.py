@@ -19,14 +19,17 @@ sys.path.insert(0, str(Path(__file__).parent))
 from data.schema_v2 import (
     CoreWineMetadata,
     RestaurantWineMetadata,
-    get_price_range
+    generate_master_ids,
+    get_price_ranges
 )
-from data.embedding_pipeline import EmbeddingPipeline
-from config import settings
+from data.embedding_pipeline import EmbeddingPipeline, EmbeddingError
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Texts per embeddings request
+EMBED_BATCH_SIZE = 256
+
 
 class SchemaV2Migrator:
     """Migrates wine data to Schema V2 format."""
@@ -93,55 +96,63 @@ class SchemaV2Migrator:
         """Transform DataFrame to Schema V2 format."""
         wines = []
 
-        for idx, row in df.iterrows():
+        # Plain tuples with a column-position map; iterrows builds a Series per row
+        cols = {c: i for i, c in enumerate(df.columns)}
+        has_label = 'label' in cols
+        has_major_region = 'major_region' in cols
+        has_price = 'price' in cols
+        has_tasting = 'tasting_keywords' in cols
+        has_vintage = 'vintage' in cols
+        has_wine_type = 'wine_type' in cols
+
+        master_ids = generate_master_ids(df)
+
+        # Parse and bucket the whole price column at once; missing or
+        # unparseable prices get no exact price and fall in the "<$50" bucket
+        if has_price:
+            numeric_prices = pd.to_numeric(df['price'], errors='coerce').astype(float)
+            price_ranges = get_price_ranges(numeric_prices.fillna(0))
+            prices = [None if pd.isna(p) else p for p in numeric_prices.tolist()]
+        else:
+            price_ranges = ["<$50"] * len(df)
+            prices = [None] * len(df)
+
+        rows = zip(df.itertuples(index=False, name=None), master_ids, prices, price_ranges)
+        for row, master_id, price, price_range in rows:
+            producer = str(row[cols['producer']])
+            label = str(row[cols['label']]) if has_label else ''
+            grapes = str(row[cols['grapes']])
+            region = str(row[cols['region']])
+            major_region = str(row[cols['major_region']]) if has_major_region else region
+            country = str(row[cols['country']])
+
             # Generate standardized text (no price, no restaurant)
             text = CoreWineMetadata.generate_text(
-                producer=str(row['producer']),
-                label=str(row.get('label', '')),
-                grapes=str(row['grapes']),
-                region=str(row['region']),
-                major_region=str(row.get('major_region', row['region'])),
-                country=str(row['country'])
+                producer=producer,
+                label=label,
+                grapes=grapes,
+                region=region,
+                major_region=major_region,
+                country=country
             )
 
-            # Generate master ID
-            master_id = CoreWineMetadata.generate_master_id(
-                producer=str(row['producer']),
-                label=str(row.get('label', '')),
-                grapes=str(row['grapes']),
-                region=str(row['region']),
-                country=str(row['country'])
-            )
-
-            # Get price and price range
-            price = None
-            price_range = ""
-            if 'price' in row and pd.notna(row['price']):
-                try:
-                    price = float(row['price'])
-                    price_range = get_price_range(price)
-                except:
-                    price_range = "<$50"  # Default if price invalid
-            else:
-                price_range = "<$50"  # Default if no price
-
             # Create restaurant metadata
             wine_metadata = RestaurantWineMetadata(
-                producer=str(row['producer']),
-                label=str(row.get('label', '')),
-                grapes=str(row['grapes']),
-                region=str(row['region']),
-                major_region=str(row.get('major_region', row['region'])),
-                country=str(row['country']),
+                producer=producer,
+                label=label,
+                grapes=grapes,
+                region=region,
+                major_region=major_region,
+                country=country,
                 text=text,
                 price_range=price_range,
                 price=price,
                 list_id=list_id,
                 qr_id=qr_id,
                 restaurant=restaurant,
-                tasting_keywords=str(row.get('tasting_keywords', '')),
-                vintage=str(row.get('vintage', '')),
-                wine_type=str(row.get('wine_type', ''))
+                tasting_keywords=str(row[cols['tasting_keywords']]) if has_tasting else '',
+                vintage=str(row[cols['vintage']]) if has_vintage else '',
+                wine_type=str(row[cols['wine_type']]) if has_wine_type else ''
             )
 
             # Generate restaurant-specific vector ID
@@ -162,6 +173,21 @@ class SchemaV2Migrator:
         logger.info(f"Transformed {len(wines)} wines to Schema V2")
         return wines
 
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts in batches through the pipeline's embedding cache.
+
+        Duplicate texts are sent once, and texts embedded on an earlier run
+        are read back from disk, so re-migrations only pay for changed rows.
+        """
+        text_batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+        embeddings = []
+        for batch_embeddings in self.pipeline.get_embeddings_cached(text_batches):
+            if batch_embeddings is None:
+                raise EmbeddingError("Embedding failed for part of the wine list")
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
     def embed_to_pinecone(
         self,
         wines: List[Dict],
@@ -172,8 +198,7 @@ class SchemaV2Migrator:
         logger.info(f"Embedding {len(wines)} wines to namespace: {namespace}")
 
         # Generate embeddings for all texts
-        texts = [wine['text'] for wine in wines]
-        embeddings = self.pipeline.get_embeddings(texts)
+        embeddings = self._embed_texts([wine['text'] for wine in wines])
 
         # Build vectors
         vectors = []
@@ -185,15 +210,7 @@ class SchemaV2Migrator:
             })
 
         # Upload in batches
-        total_uploaded = 0
-        for i in range(0, len(vectors), batch_size):
-            batch = vectors[i:i + batch_size]
-            try:
-                self.pipeline.index.upsert(vectors=batch, namespace=namespace)
-                total_uploaded += len(batch)
-                logger.info(f"Uploaded batch {i//batch_size + 1}: {len(batch)} vectors")
-            except Exception as e:
-                logger.error(f"Error uploading batch: {e}")
+        total_uploaded = self.pipeline.upsert_parallel(vectors, namespace, batch_size)
 
         logger.info(f"Successfully uploaded {total_uploaded} vectors to {namespace}")
         return total_uploaded
@@ -262,39 +279,45 @@ class SchemaV2Migrator:
 
         # Transform to master format (no restaurant-specific fields)
         wines = []
-        for idx, row in df.iterrows():
-            text = CoreWineMetadata.generate_text(
-                producer=str(row['producer']),
-                label=str(row.get('label', '')),
-                grapes=str(row['grapes']),
-                region=str(row['region']),
-                major_region=str(row.get('major_region', row['region'])),
-                country=str(row['country'])
-            )
+        cols = {c: i for i, c in enumerate(df.columns)}
+        has_label = 'label' in cols
+        has_major_region = 'major_region' in cols
+        has_tasting = 'tasting_keywords' in cols
 
-            master_id = CoreWineMetadata.generate_master_id(
-                producer=str(row['producer']),
-                label=str(row.get('label', '')),
-                grapes=str(row['grapes']),
-                region=str(row['region']),
-                country=str(row['country'])
+        master_ids = generate_master_ids(df)
+
+        for row, master_id in zip(df.itertuples(index=False, name=None), master_ids):
+            producer = str(row[cols['producer']])
+            label = str(row[cols['label']]) if has_label else ''
+            grapes = str(row[cols['grapes']])
+            region = str(row[cols['region']])
+            major_region = str(row[cols['major_region']]) if has_major_region else region
+            country = str(row[cols['country']])
+
+            text = CoreWineMetadata.generate_text(
+                producer=producer,
+                label=label,
+                grapes=grapes,
+                region=region,
+                major_region=major_region,
+                country=country
             )
 
             # Core metadata only (no restaurant fields)
             core_metadata = CoreWineMetadata(
-                producer=str(row['producer']),
-                label=str(row.get('label', '')),
-                grapes=str(row['grapes']),
-                region=str(row['region']),
-                major_region=str(row.get('major_region', row['region'])),
-                country=str(row['country']),
+                producer=producer,
+                label=label,
+                grapes=grapes,
+                region=region,
+                major_region=major_region,
+                country=country,
                 text=text
             )
 
             # Add optional tasting note if present
             metadata_dict = core_metadata.to_dict()
-            if 'tasting_keywords' in row and pd.notna(row['tasting_keywords']):
-                metadata_dict['tasting_note'] = str(row['tasting_keywords'])
+            if has_tasting and pd.notna(row[cols['tasting_keywords']]):
+                metadata_dict['tasting_note'] = str(row[cols['tasting_keywords']])
 
             wines.append({
                 'master_id': master_id,
@@ -303,8 +326,7 @@ class SchemaV2Migrator:
             })
 
         # Generate embeddings
-        texts = [wine['text'] for wine in wines]
-        embeddings = self.pipeline.get_embeddings(texts)
+        embeddings = self._embed_texts([wine['text'] for wine in wines])
 
         # Build vectors with master IDs
         vectors = []
@@ -316,16 +338,7 @@ class SchemaV2Migrator:
             })
 
         # Upload to Pinecone
-        total_uploaded = 0
-        batch_size = 100
-        for i in range(0, len(vectors), batch_size):
-            batch = vectors[i:i + batch_size]
-            try:
-                self.pipeline.index.upsert(vectors=batch, namespace=namespace)
-                total_uploaded += len(batch)
-                logger.info(f"Uploaded batch {i//batch_size + 1}: {len(batch)} vectors")
-            except Exception as e:
-                logger.error(f"Error uploading batch: {e}")
+        total_uploaded = self.pipeline.upsert_parallel(vectors, namespace)
 
         logger.info(f"\n{'='*60}")
         logger.info(f"Producers migration complete: {total_uploaded} wines")
@@ -92,6 +92,7 @@ def embed_maass_to_restaurant_namespace(pipeline):
                 "price": row.get('price'),
                 "tasting_keywords": row['tasting_keywords'],
                 "list_id": row['list_id'],
+                "list_ids": [row['list_id']],
                 "qr_id": row['qr_id'],
                 "restaurant": row['restaurant'],
                 "source": "maass_schema_v2"
@@ -13,6 +13,12 @@ from restaurants.restaurant_config import get_restaurant_config
 from restaurants.wine_recommender import WineRecommender
 
 
+@st.cache_resource
+def get_recommender(restaurant_id: str) -> WineRecommender:
+    """Build one recommender per restaurant, shared across all sessions."""
+    return WineRecommender(get_restaurant_config(restaurant_id))
+
+
 def init_session_state():
     """Initialize Streamlit session state."""
     if "messages" not in st.session_state:
@@ -100,7 +106,7 @@ def main():
     # Initialize recommender if needed
     if st.session_state.config != config:
         st.session_state.config = config
-        st.session_state.recommender = WineRecommender(config)
+        st.session_state.recommender = get_recommender(restaurant_id)
         st.session_state.messages = []
 
     # Sleek black and white with custom icons
@@ -13,12 +13,18 @@ from restaurants.restaurant_config import MAASS_CONFIG
 from restaurants.wine_recommender import WineRecommender
 
 
+@st.cache_resource
+def get_recommender() -> WineRecommender:
+    """Build the MAASS recommender once and share it across all sessions."""
+    return WineRecommender(MAASS_CONFIG)
+
+
 def init_session_state():
     """Initialize Streamlit session state."""
     if "messages" not in st.session_state:
         st.session_state.messages = []
     if "recommender" not in st.session_state:
-        st.session_state.recommender = WineRecommender(MAASS_CONFIG)
+        st.session_state.recommender = get_recommender()
 
 
 def display_welcome():
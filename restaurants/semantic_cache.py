@@ -0,0 +1,89 @@
+"""
+Semantic query cache for wine recommendations.
+Returns a previous result when a new query is close enough in embedding space.
+"""
+from typing import List, Dict, Optional
+import copy
+import logging
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """In-process cache keyed by query embedding (cosine similarity lookup)."""
+
+    def __init__(self, threshold: float = 0.93, ttl: int = 3600, max_entries: int = 1000):
+        """
+        Initialize SemanticCache.
+
+        Args:
+            threshold: Minimum cosine similarity for a cache hit
+            ttl: Seconds before an entry expires
+            max_entries: Oldest entries are evicted beyond this size
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Dict] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _evict_expired(self, now: float) -> None:
+        keep = [i for i, entry in enumerate(self._entries) if now - entry["ts"] < self.ttl]
+        keep = keep[-self.max_entries:]
+        if len(keep) == len(self._entries):
+            return
+        self._entries = [self._entries[i] for i in keep]
+        self._vectors = self._vectors[keep] if keep else None
+
+    def get(self, embedding: List[float], scope: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Look up a cached result for a semantically similar query.
+
+        Args:
+            embedding: Query embedding
+            scope: Extra exact-match key (e.g. the extracted price filter)
+
+        Returns:
+            Copy of the cached result, or None on miss
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            self._evict_expired(time.time())
+            if self._vectors is None:
+                return None
+
+            scores = self._vectors @ query
+            for idx in np.argsort(scores)[::-1]:
+                if scores[idx] < self.threshold:
+                    break
+                entry = self._entries[idx]
+                if entry["scope"] == scope:
+                    logger.debug(f"Semantic cache hit (score {scores[idx]:.3f})")
+                    return copy.deepcopy(entry["result"])
+        return None
+
+    def put(self, embedding: List[float], result: List[Dict], scope: Optional[str] = None) -> None:
+        """Store a result under its query embedding."""
+        vector = self._normalize(embedding)[np.newaxis, :]
+        with self._lock:
+            self._entries.append({
+                "result": copy.deepcopy(result),
+                "scope": scope,
+                "ts": time.time(),
+            })
+            if self._vectors is None:
+                self._vectors = vector
+            else:
+                self._vectors = np.vstack([self._vectors, vector])
+            self._evict_expired(time.time())
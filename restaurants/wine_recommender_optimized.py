@@ -19,6 +19,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from data.embedding_pipeline import EmbeddingPipeline
 from restaurants.restaurant_config import RestaurantConfig
+from restaurants.semantic_cache import SemanticCache
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -106,6 +107,10 @@ class OptimizedWineRecommender:
         self.config = config
         self.pipeline = EmbeddingPipeline()
         self.cache = WineCache()
+        self.semantic_cache = SemanticCache(
+            threshold=settings.semantic_cache_threshold,
+            ttl=settings.semantic_cache_ttl
+        )
 
         # Initialize Grok client
         xai_api_key = settings.get_decrypted_xai_key()
@@ -506,7 +511,8 @@ Respond with ONLY the wine numbers (e.g., "1,7" or "3,9") separated by a comma.
         self,
         user_query: str,
         top_k: int = 10,  # Reduced from 20
-        filters: Optional[Dict] = None
+        filters: Optional[Dict] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict]:
         """Get exactly 2 wine recommendations (OPTIMIZED VERSION)."""
         logger.info(f"Getting recommendations for: {user_query}")
@@ -527,7 +533,8 @@ Respond with ONLY the wine numbers (e.g., "1,7" or "3,9") separated by a comma.
             list_id=self.config.namespace,
             top_k=top_k,
             filters=filters,
-            namespace=self.config.namespace
+            namespace=self.config.namespace,
+            query_embedding=query_embedding
         )
 
         if not matches:
@@ -594,7 +601,27 @@ Respond with ONLY the wine numbers (e.g., "1,7" or "3,9") separated by a comma.
         filters: Optional[Dict] = None
     ) -> List[Dict]:
         """Get wine recommendations without intro text (OPTIMIZED)."""
-        return self.get_recommendations(user_query, filters=filters)
+        if filters:
+            return self.get_recommendations(user_query, filters=filters)
+
+        # Embed once: the same vector drives the cache lookup and the search
+        query_embedding = self.pipeline.get_embeddings([user_query])[0]
+
+        # Queries only share results when they resolve to the same price
+        # filter and the same food-pairing behaviour
+        scope = json.dumps(
+            [self.extract_price_filter(user_query), self.wants_food_pairing(user_query)],
+            sort_keys=True
+        )
+        cached = self.semantic_cache.get(query_embedding, scope=scope)
+        if cached is not None:
+            logger.info(f"Semantic cache hit for: {user_query}")
+            return cached
+
+        wines = self.get_recommendations(user_query, query_embedding=query_embedding)
+        if wines:
+            self.semantic_cache.put(query_embedding, wines, scope=scope)
+        return wines
 
 
 def test_optimized_recommender():
@@ -0,0 +1,89 @@
+"""
+Offline check that the direct list-vector metadata builder stays in sync
+with RestaurantWineEmbedding.to_pinecone_metadata().
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Settings are loaded at import time; placeholders keep this test offline
+for _name in ("XAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT"):
+    os.environ.setdefault(_name, "test")
+
+from data.embedding_pipeline import _make_wine_metadata
+from data.schema_definitions import RestaurantWineEmbedding, Wine, WineType
+
+
+def _sample_wine(wine_name):
+    return Wine(
+        wine_id="wine_0001",
+        qr_id="qr_maass",
+        producer="Domaine Tempier",
+        wine_name=wine_name,
+        region="Bandol",
+        country="France",
+        vintage=2019,
+        price=85.0,
+        grapes=["Mourvèdre", "Grenache"],
+        wine_type=WineType.RED,
+        tasting_note="Dark fruit, garrigue and leather.",
+    )
+
+
+def _assert_in_sync(wine, list_ids):
+    text = "Domaine Tempier Bandol"
+    grapes = ",".join(wine.grapes)
+    keywords = wine.tasting_note[:100]
+    direct = _make_wine_metadata(
+        wine=wine,
+        text=text,
+        grapes=grapes,
+        keywords=keywords,
+        price_range="$50-100",
+        list_id="maass_wine_list",
+        list_ids=list_ids,
+        content_hash="abc123",
+    )
+    model = RestaurantWineEmbedding(
+        producer=wine.producer,
+        label=wine.wine_name,
+        grapes=grapes,
+        region=wine.region,
+        major_region=None,
+        country=wine.country,
+        text=text,
+        price_range="$50-100",
+        price=wine.price,
+        tasting_keywords=keywords,
+        list_id="maass_wine_list",
+        list_ids=list_ids,
+        qr_id=wine.qr_id,
+        restaurant="maass",
+        wine_id=wine.wine_id,
+        content_hash="abc123",
+    ).to_pinecone_metadata()
+
+    # Same keys in the same order, with the same values
+    assert list(direct.items()) == list(model.items())
+
+
+def test_metadata_matches_model_with_list_ids():
+    _assert_in_sync(_sample_wine("Bandol Rouge"), ["maass_wine_list", "master"])
+
+
+def test_metadata_matches_model_without_list_ids():
+    _assert_in_sync(_sample_wine("Bandol Rouge"), [])
+
+
+def test_metadata_matches_model_without_wine_name():
+    _assert_in_sync(_sample_wine(None), ["maass_wine_list"])
+    _assert_in_sync(_sample_wine(None), [])
+
+
+if __name__ == "__main__":
+    test_metadata_matches_model_with_list_ids()
+    test_metadata_matches_model_without_list_ids()
+    test_metadata_matches_model_without_wine_name()
+    print("[OK] List-vector metadata matches RestaurantWineEmbedding")